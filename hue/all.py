@@ -3,6 +3,9 @@ class All:
         self.base: str = parent.base
         self.request = parent.request
     
+    def full_state(self):
+        return self.request(path="")
+    
     def lights(self):
         return self.request(path="lights")
     
@@ -0,0 +1,216 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from . import util
+from .color import hex2rgb_batch, rgb2xy_batch
+
+
+def linear(t: np.ndarray) -> np.ndarray:
+    return t
+
+
+def ease_in(t: np.ndarray) -> np.ndarray:
+    return t * t
+
+
+def ease_out(t: np.ndarray) -> np.ndarray:
+    return t * (2 - t)
+
+
+def ease_in_out(t: np.ndarray) -> np.ndarray:
+    return np.where(t < 0.5, 2 * t * t, -1 + (4 - 2 * t) * t)
+
+
+def step(t: np.ndarray) -> np.ndarray:
+    return np.floor(t)
+
+
+EASINGS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "linear": linear,
+    "ease_in": ease_in,
+    "ease_out": ease_out,
+    "ease_in_out": ease_in_out,
+    "step": step,
+}
+
+Color = Union[str, Sequence[int]]
+
+
+def _colors(colors: Union[Color, Sequence[Color]]) -> list:
+    """
+    :return: A list of colors, a single hex or RGB color becomes a list of one
+    """
+    if type(colors) is str:
+        return [colors]
+    if len(colors) == 3 and not isinstance(colors[0], (str, list, tuple, np.ndarray)):
+        return [colors]
+    return list(colors)
+
+
+def _rgb(colors: Union[Color, Sequence[Color]], size: int) -> np.ndarray:
+    """
+    :return: RGB array of shape (size, 3) from one color or one color per light (hex or RGB)
+    """
+    colors = _colors(colors)
+    if type(colors[0]) is str:
+        arr = hex2rgb_batch(colors).astype(np.float64)
+    else:
+        arr = np.asarray(colors, dtype=np.float64).reshape(-1, 3)
+    if len(arr) == 1:
+        return np.repeat(arr, size, axis=0)
+    if len(arr) != size:
+        raise ValueError(f"Expected 1 or {size} colors, got {len(arr)}.")
+    return arr
+
+
+class Timeline:
+    """
+    Keyframed colors for a list of lights.
+    Each keyframe holds one RGB color per light; frames in between are interpolated with
+    the easing of the next keyframe, for all lights at once.
+    """
+    
+    def __init__(self, light_ids: Sequence[Union[int, str]], loop: bool = False):
+        self.light_ids: List[Union[int, str]] = list(light_ids)
+        self.loop: bool = loop
+        self.times: List[float] = []
+        self.colors: List[np.ndarray] = []
+        self.easings: List[Callable[[np.ndarray], np.ndarray]] = []
+    
+    @property
+    def duration(self) -> float:
+        return self.times[-1] if self.times else 0.0
+    
+    def keyframe(self, at: float, colors: Union[Color, Sequence[Color]], easing: str = "linear") -> "Timeline":
+        """
+        :param at: Seconds from the start
+        :param colors: One color for every light, or one per light (hex code or RGB)
+        """
+        index: int = int(np.searchsorted(self.times, at, side="right"))
+        self.times.insert(index, float(at))
+        self.colors.insert(index, _rgb(colors, len(self.light_ids)))
+        self.easings.insert(index, EASINGS[easing])
+        return self
+    
+    def gradient(self, at: float, start: Color, end: Color, easing: str = "linear") -> "Timeline":
+        """
+        Keyframe spreading a gradient from start to end across the lights.
+        """
+        rgb = _rgb([start, end], 2)
+        weights = np.linspace(0.0, 1.0, len(self.light_ids))[:, None]
+        return self.keyframe(at, (1 - weights) * rgb[0] + weights * rgb[1], easing=easing)
+    
+    def chase(self, start: float, period: float, colors: Union[Color, Sequence[Color]], background: Color = (0, 0, 0),
+              steps: Optional[int] = None, easing: str = "linear") -> "Timeline":
+        """
+        Keyframes moving `colors` (one color or several) along the lights, one light every `period` seconds.
+        """
+        size: int = len(self.light_ids)
+        colors = _colors(colors)
+        pattern = _rgb(colors, len(colors))
+        base = _rgb(background, size)
+        for n in range(steps if steps is not None else size):
+            frame = base.copy()
+            positions = (np.arange(len(pattern)) + n) % size
+            frame[positions] = pattern
+            self.keyframe(start + n * period, frame, easing=easing)
+        return self
+    
+    def render(self, t: float) -> np.ndarray:
+        """
+        :return: RGB array of shape (len(light_ids), 3) at time t
+        """
+        if not self.times:
+            raise ValueError("The timeline has no keyframes.")
+        if self.loop and self.duration > 0:
+            t = t % self.duration
+        index: int = int(np.searchsorted(self.times, t, side="right"))
+        if index == 0:
+            return self.colors[0]
+        if index == len(self.times):
+            return self.colors[-1]
+        t0, t1 = self.times[index - 1], self.times[index]
+        ratio = self.easings[index](np.asarray((t - t0) / (t1 - t0)))
+        return self.colors[index - 1] + (self.colors[index] - self.colors[index - 1]) * ratio
+    
+    def render_xy(self, t: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: (xy of shape (N, 2), bri of shape (N,) between 0 and 254) at time t, in one batch
+        """
+        rgb = self.render(t)
+        bri = rgb.max(axis=1)
+        xy = np.zeros((len(rgb), 2))
+        lit = bri > 0
+        if lit.any():
+            xy[lit] = rgb2xy_batch(np.clip(rgb[lit], 0, 255))
+        return xy, np.rint(bri / 255.0 * 254).astype(int)
+
+
+class Player:
+    """
+    Plays a Timeline through Lights.action within the REST command budget.
+    The frame interval is stretched so that one frame for every changed light fits in
+    `budget` commands per second, and each command carries a transitiontime equal to
+    the frame interval so that the bridge interpolates between the sparse frames.
+    The command sent at time t holds the frame of t + interval, so each transition ends on time.
+    """
+    
+    def __init__(self, hue, timeline: Timeline, budget: float = util.LIGHT_COMMANDS_PER_SEC,
+                 max_fps: float = util.ANIMATION_MAX_FPS, tolerance: float = 0.002):
+        self.hue = hue
+        self.timeline: Timeline = timeline
+        self.budget: float = budget
+        self.max_fps: float = max_fps
+        self.tolerance: float = tolerance
+        self.interval: float = max(1.0 / max_fps, len(timeline.light_ids) / budget)
+        self.commands: int = 0
+        self._last: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._stop = threading.Event()
+    
+    def frame_commands(self, t: float) -> List[Tuple[Union[int, str], dict]]:
+        """
+        :return: (light_id, payload) for the lights whose color changed since the previous frame
+        """
+        xy, bri = self.timeline.render_xy(t)
+        transitiontime: int = max(0, int(round(self.interval * 10)))
+        changed = np.ones(len(xy), dtype=bool)
+        if self._last is not None:
+            last_xy, last_bri = self._last
+            changed = (np.abs(xy - last_xy).max(axis=1) > self.tolerance) | (bri != last_bri)
+        self._last = (xy, bri)
+        commands: List[Tuple[Union[int, str], dict]] = []
+        for n in np.flatnonzero(changed):
+            payload: dict = {"transitiontime": transitiontime}
+            if bri[n] == 0:
+                payload["on"] = False
+            else:
+                payload.update({"on": True, "bri": int(bri[n]), "xy": [float(xy[n, 0]), float(xy[n, 1])]})
+            commands.append((self.timeline.light_ids[n], payload))
+        return commands
+    
+    def play(self, duration: Optional[float] = None) -> None:
+        """
+        Block until the timeline ends (or `duration` seconds for looping timelines) or stop() is called.
+        """
+        self._stop.clear()
+        self._last = None
+        end: float = duration if duration is not None else self.timeline.duration
+        start: float = time.monotonic()
+        frame: int = 0
+        while not self._stop.is_set():
+            # Frames stay on the interval grid, the transition started at t reaches the frame of t + interval
+            target: float = min((frame + 1) * self.interval, end)
+            for light_id, payload in self.frame_commands(target):
+                self.hue.lights.action(light_id, payload=payload)
+                self.commands += 1
+            if target >= end:
+                break
+            frame += 1
+            if (delay := start + frame * self.interval - time.monotonic()) > 0:
+                self._stop.wait(delay)
+    
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,128 @@
+import time
+from typing import Optional, Union, Tuple
+
+import aiohttp
+
+from . import util
+from .util import rgb2xy, hex2xy
+from .all import All
+from .lights import Lights
+from .batch import StateBatch
+from .groups import Groups
+from .scenes import Scenes
+from .schedules import Schedules
+from .sensors import Sensors
+from .rules import Rules
+from .metrics import Metrics
+from .exceptions import (
+    GettingLightAttributeException,
+)
+
+
+class AsyncLights(Lights):
+    """
+    Lights methods return parent.request(...) directly, so with AsyncHue they return awaitables.
+    Only methods that inspect a response before sending the next request are overridden.
+    """
+    
+    async def toggle(self, light_id: Union[int, str], transitiontime: int = 5) -> Union[list, dict]:
+        res: dict = await self.get_attributes(light_id=light_id)
+        if right := res.get("state"):
+            if right.get("on"):
+                return await self.off(light_id, transitiontime)
+            return await self.on(light_id, transitiontime)
+        raise GettingLightAttributeException
+    
+    async def gamut(self, light_id: Union[int, str]) -> Optional[str]:
+        if (key := str(light_id)) not in self.gamuts:
+            self.load_gamuts({key: await self.get_attributes(light_id)})
+        return self.gamuts.get(key)
+    
+    def batch(self, light_id: Union[int, str]) -> StateBatch:
+        # Only gamuts that are already cached (gamut, load_gamuts) can be used without awaiting
+        return StateBatch(self.action, light_id, gamut=lambda: self.gamuts.get(str(light_id)))
+    
+    async def rgb(self, light_id: Union[int, str], r: int, g: int, b: int,
+                  transitiontime: int = 5, gamut: Optional[str] = None) -> Union[list, dict]:
+        x, y = rgb2xy(r, g, b, gamut=gamut or await self.gamut(light_id))
+        return await self.xy(light_id, x, y, transitiontime=transitiontime)
+    
+    async def rgbhex(self, light_id: Union[int, str], color_code: str,
+                     transitiontime: int = 5, gamut: Optional[str] = None) -> Union[list, dict]:
+        x, y = hex2xy(color_code, gamut=gamut or await self.gamut(light_id))
+        return await self.xy(light_id, x, y, transitiontime=transitiontime)
+
+
+class AsyncHue:
+    
+    def __init__(self, max_in_flight: int = util.DEFAULT_POOL_SIZE,
+                 timeout: Tuple[float, float] = util.DEFAULT_TIMEOUT,
+                 metrics: Optional[Metrics] = None,
+                 ip: Optional[str] = None, user_name: Optional[str] = None):
+        # Values (config.yml is used unless both ip and user_name are given)
+        settings: dict = {"ip": ip, "user_name": user_name} if ip and user_name else util.load_auth()
+        self.ip: str = settings["ip"]
+        self.user_name: str = settings["user_name"]
+        self.base: str = f"http://{self.ip}/api/{{user_name}}"
+        self.max_in_flight: int = max_in_flight
+        self.timeout: Tuple[float, float] = timeout
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.metrics: Optional[Metrics] = metrics
+        
+        # API
+        self.all = All(self)
+        self.lights = AsyncLights(self)
+        self.groups = Groups(self)
+        self.scenes = Scenes(self)
+        self.schedules = Schedules(self)
+        self.sensors = Sensors(self)
+        self.rules = Rules(self)
+    
+    async def __aenter__(self) -> "AsyncHue":
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+    
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        # The session must be created inside the running event loop.
+        if self.session is None or self.session.closed:
+            connect, read = self.timeout
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=self.max_in_flight),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect, sock_read=read),
+            )
+        return self.session
+    
+    async def request(self, path: str = "", method: str = "GET",
+                      user_name: Optional[str] = None,
+                      payload: Optional[dict] = None) -> Union[list, dict]:
+        user_name: str = user_name if user_name else self.user_name
+        base = self.base.format(user_name=user_name)
+        endpoint: str = f"{base}/{path}"
+        
+        session = self._get_session()
+        if self.metrics is None:
+            async with session.request(method=method, url=endpoint, json=payload) as res:
+                return await res.json(content_type=None, loads=util.json_loads)
+        
+        start: float = time.perf_counter()
+        try:
+            async with session.request(method=method, url=endpoint, json=payload) as res:
+                content: bytes = await res.read()
+                body = await res.json(content_type=None, loads=util.json_loads)
+        except Exception as e:
+            self.metrics.record(method, path, 0, time.perf_counter() - start, exception=type(e).__name__)
+            raise
+        self.metrics.record(
+            method, path, res.status, time.perf_counter() - start,
+            bytes_sent=int(res.request_info.headers.get("Content-Length", 0)),
+            bytes_received=len(content),
+            res=body,
+        )
+        return body
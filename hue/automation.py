@@ -0,0 +1,296 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from . import util
+from .exceptions import RuleLimitException
+from .reconcile import Change
+from .util import _id_check
+
+
+def _value(value: Any) -> str:
+    """
+    Rule condition values are strings on the bridge.
+    """
+    if type(value) is bool:
+        return "true" if value else "false"
+    return str(value)
+
+
+def duration(seconds: Union[int, float, str]) -> str:
+    """
+    10 -> "PT00:00:10", strings are passed through
+    """
+    if type(seconds) is str:
+        return seconds
+    total: int = int(seconds)
+    return f"PT{total // 3600:02d}:{total % 3600 // 60:02d}:{total % 60:02d}"
+
+
+class Condition:
+    __slots__ = ("address", "operator", "value")
+    
+    def __init__(self, address: str, operator: str, value: Optional[str] = None):
+        self.address: str = address
+        self.operator: str = operator
+        self.value: Optional[str] = value
+    
+    def __repr__(self) -> str:
+        return f"Condition({self.address} {self.operator} {self.value})"
+    
+    def compile(self) -> dict:
+        condition: dict = {"address": self.address, "operator": self.operator}
+        if self.value is not None:
+            condition["value"] = self.value
+        return condition
+
+
+class Attribute:
+    """
+    A bridge attribute usable in conditions.
+
+    sensor(5).presence == True          -> eq "true"
+    sensor(5).lightlevel < 10000        -> lt "10000"
+    sensor(5).buttonevent.changed()     -> dx
+    sensor(5).presence.stable(300)      -> stable "PT00:05:00"
+    """
+    __slots__ = ("address",)
+    
+    def __init__(self, address: str):
+        self.address: str = address
+    
+    def __repr__(self) -> str:
+        return f"Attribute({self.address})"
+    
+    def __eq__(self, value: Any) -> Condition:
+        return Condition(self.address, "eq", _value(value))
+    
+    def __ne__(self, value: Any) -> Condition:
+        if type(value) is bool:
+            return Condition(self.address, "eq", _value(not value))
+        raise TypeError("Bridge rules have no not-equal operator, use eq, gt or lt.")
+    
+    def __gt__(self, value: Any) -> Condition:
+        return Condition(self.address, "gt", _value(value))
+    
+    def __lt__(self, value: Any) -> Condition:
+        return Condition(self.address, "lt", _value(value))
+    
+    __hash__ = None
+    
+    def changed(self) -> Condition:
+        return Condition(self.address, "dx")
+    
+    def changed_after(self, seconds: Union[int, str]) -> Condition:
+        """
+        Delayed trigger, the rule runs `seconds` after the attribute changed.
+        """
+        return Condition(self.address, "ddx", duration(seconds))
+    
+    def stable(self, seconds: Union[int, str]) -> Condition:
+        return Condition(self.address, "stable", duration(seconds))
+    
+    def not_stable(self, seconds: Union[int, str]) -> Condition:
+        return Condition(self.address, "not stable", duration(seconds))
+
+
+class Action:
+    __slots__ = ("address", "method", "body")
+    
+    def __init__(self, address: str, body: dict, method: str = "PUT"):
+        self.address: str = address
+        self.method: str = method
+        self.body: dict = body
+    
+    def __repr__(self) -> str:
+        return f"Action({self.method} {self.address} {self.body})"
+    
+    def compile(self) -> dict:
+        return {"address": self.address, "method": self.method, "body": self.body}
+
+
+class Sensor:
+    """
+    sensor(5).presence is the state attribute, sensor(5).attribute("config/on") any other one.
+    """
+    
+    def __init__(self, sensor_id: Union[int, str]):
+        _id_check(sensor_id)
+        self.id: str = str(sensor_id)
+    
+    def __getattr__(self, name: str) -> Attribute:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return Attribute(f"/sensors/{self.id}/state/{name}")
+    
+    def attribute(self, path: str) -> Attribute:
+        return Attribute(f"/sensors/{self.id}/{path.strip('/')}")
+    
+    def set_state(self, **body: Any) -> Action:
+        return Action(f"/sensors/{self.id}/state", body)
+    
+    def set_config(self, **body: Any) -> Action:
+        return Action(f"/sensors/{self.id}/config", body)
+
+
+class Light:
+    def __init__(self, light_id: Union[int, str]):
+        _id_check(light_id)
+        self.id: str = str(light_id)
+    
+    def attribute(self, name: str) -> Attribute:
+        return Attribute(f"/lights/{self.id}/state/{name}")
+    
+    def state(self, **body: Any) -> Action:
+        return Action(f"/lights/{self.id}/state", body)
+
+
+class Group:
+    def __init__(self, group_id: Union[int, str]):
+        _id_check(group_id)
+        self.id: str = str(group_id)
+    
+    @property
+    def any_on(self) -> Attribute:
+        return Attribute(f"/groups/{self.id}/state/any_on")
+    
+    @property
+    def all_on(self) -> Attribute:
+        return Attribute(f"/groups/{self.id}/state/all_on")
+    
+    def action(self, **body: Any) -> Action:
+        return Action(f"/groups/{self.id}/action", body)
+    
+    def scene(self, scene_id: str) -> Action:
+        return self.action(scene=scene_id)
+
+
+def sensor(sensor_id: Union[int, str]) -> Sensor:
+    return Sensor(sensor_id)
+
+
+def light(light_id: Union[int, str]) -> Light:
+    return Light(light_id)
+
+
+def group(group_id: Union[int, str]) -> Group:
+    return Group(group_id)
+
+
+def time_in(interval: str) -> Condition:
+    """
+    :param interval: Local time interval, e.g. "T22:00:00/T06:00:00" or "W124/T07:00:00/T09:00:00"
+    """
+    return Condition("/config/localtime", "in", interval)
+
+
+def time_not_in(interval: str) -> Condition:
+    return Condition("/config/localtime", "not in", interval)
+
+
+class Rule:
+    """
+    Rule("Hall motion",
+         when=[sensor(5).presence == True, sensor(6).dark == True, time_in("T18:00:00/T23:00:00")],
+         then=[group(1).action(on=True, bri=200)])
+    """
+    
+    def __init__(self, name: str, when: Union[Condition, Iterable[Condition]],
+                 then: Union[Action, Iterable[Action]], status: str = "enabled"):
+        self.name: str = name
+        self.conditions: List[Condition] = [when] if isinstance(when, Condition) else list(when)
+        self.actions: List[Action] = [then] if isinstance(then, Action) else list(then)
+        self.status: str = status
+    
+    def __repr__(self) -> str:
+        return f"Rule({self.name!r}, {len(self.conditions)} conditions, {len(self.actions)} actions)"
+    
+    def validate(self) -> "Rule":
+        if not 0 < len(self.name) <= util.RULE_NAME_MAX_LENGTH:
+            raise RuleLimitException(f"{self.name!r}: the name must have 1 to {util.RULE_NAME_MAX_LENGTH} characters")
+        if not 0 < len(self.conditions) <= util.RULE_MAX_CONDITIONS:
+            raise RuleLimitException(f"{self.name!r}: {len(self.conditions)} conditions, "
+                                     f"1 to {util.RULE_MAX_CONDITIONS} are allowed")
+        if not 0 < len(self.actions) <= util.RULE_MAX_ACTIONS:
+            raise RuleLimitException(f"{self.name!r}: {len(self.actions)} actions, "
+                                     f"1 to {util.RULE_MAX_ACTIONS} are allowed")
+        for condition in self.conditions:
+            if not isinstance(condition, Condition):
+                raise TypeError(f"{self.name!r}: {condition!r} is not a condition (e.g. sensor(5).presence == True)")
+        for action in self.actions:
+            if not isinstance(action, Action):
+                raise TypeError(f"{self.name!r}: {action!r} is not an action (e.g. group(1).action(on=True))")
+        return self
+    
+    def compile(self) -> dict:
+        self.validate()
+        return {
+            "name": self.name,
+            "conditions": [condition.compile() for condition in self.conditions],
+            "actions": [action.compile() for action in self.actions],
+            "status": self.status,
+        }
+
+
+def plan_rules(rules: Iterable[Rule], current: dict, owner: Optional[str] = None, prune: bool = True) -> List[Change]:
+    """
+    :param current: Response of All.rules()
+    :param owner: User name of this client, only the rules it owns are matched and deleted by prune,
+                  a rule of another application with the same name is left alone
+    :return: The creates, updates and deletes turning `current` into `rules`
+    """
+    desired: Dict[str, dict] = {}
+    for rule in rules:
+        compiled: dict = rule.compile()
+        if compiled["name"] in desired:
+            raise ValueError(f"Duplicated rule name {compiled['name']!r}")
+        desired[compiled["name"]] = compiled
+    owned: dict = {id_: item for id_, item in current.items() if owner is None or item.get("owner") == owner}
+    existing: Dict[str, Tuple[str, dict]] = util.by_name(owned)
+    changes: List[Change] = []
+    for name, compiled in desired.items():
+        if name not in existing:
+            changes.append(Change("rules", "create", name, None, compiled))
+            continue
+        id_, item = existing[name]
+        # Compared both ways: a key left out of an action body must be removed on the bridge too
+        updates: dict = {key: value for key, value in compiled.items()
+                         if key != "name" and not (util.same(value, item.get(key)) and util.same(item.get(key), value))}
+        if updates:
+            changes.append(Change("rules", "update", name, id_, updates))
+    if prune:
+        kept = {existing[name][0] for name in desired if name in existing}
+        changes += [Change("rules", "delete", item.get("name", ""), id_, {}) for id_, item in owned.items()
+                    if id_ not in kept]
+    count: int = len(current) + sum(1 if change.op == "create" else -1 if change.op == "delete" else 0
+                                    for change in changes)
+    if count > util.RULES_MAX:
+        raise RuleLimitException(f"{count} rules after the sync, the bridge holds up to {util.RULES_MAX}")
+    return changes
+
+
+def _send(hue, change: Change) -> Union[list, dict]:
+    if change.op == "create":
+        payload: dict = dict(change.payload)
+        return hue.rules.create(payload.pop("name"), payload.pop("conditions"), payload.pop("actions"), params=payload)
+    if change.op == "update":
+        return hue.rules.set_attributes(change.id, change.payload)
+    return hue.rules.delete(change.id)
+
+
+def sync_rules(hue, rules: Iterable[Rule], prune: bool = True, dry_run: bool = False,
+               workers: int = 4) -> Union[List[Change], List[Tuple[Change, Union[list, dict]]]]:
+    """
+    Make the rules on the bridge match `rules` (matched by name) with the fewest writes.
+    Deletes run first to free room under the rule limit, then creates and updates in parallel.
+    :param prune: Delete the rules of this client (same owner) that are not in `rules`
+    """
+    changes: List[Change] = plan_rules(rules, hue.all.rules(), owner=hue.user_name, prune=prune)
+    if dry_run:
+        return changes
+    results: List[Tuple[Change, Union[list, dict]]] = []
+    deletes: List[Change] = [change for change in changes if change.op == "delete"]
+    upserts: List[Change] = [change for change in changes if change.op != "delete"]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch in (deletes, upserts):
+            results += zip(batch, executor.map(lambda change: _send(hue, change), batch))
+    return results
@@ -0,0 +1,100 @@
+from typing import Any, Callable, Optional, Union
+
+from .util import range_check, _id_check, rgb2xy, hex2xy
+from .exceptions import (
+    BrightnessRangeException,
+    HueRangeException,
+    SaturationRangeException,
+)
+
+
+class StateBatch:
+    """
+    Collects state changes for one light or group and sends them as a single action.
+    
+    with hue.lights.batch(1) as s:
+        s.on().brightness(val=200).rgbhex("#FF8800")
+    """
+    
+    def __init__(self, action: Callable[..., Any], target_id: Union[int, str],
+                 gamut: Optional[Callable[[], Optional[str]]] = None):
+        """
+        :param gamut: Returns the color gamut of the target, used by rgb and rgbhex
+        """
+        _id_check(target_id)
+        self.action = action
+        self.gamut = gamut
+        self.target_id: Union[int, str] = target_id
+        self.payload: dict = {}
+        self.result: Optional[Union[list, dict]] = None
+    
+    def __enter__(self) -> "StateBatch":
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.commit()
+    
+    async def __aenter__(self) -> "StateBatch":
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None and self.payload:
+            self.result = await self.commit()
+    
+    def commit(self) -> Optional[Union[list, dict]]:
+        """
+        Send the collected changes in one request and reset the batch.
+        :return: The response of the action, or None if nothing was changed
+        """
+        if not self.payload:
+            return None
+        payload: dict = self.payload
+        self.payload = {}
+        self.result = self.action(self.target_id, payload=payload)
+        return self.result
+    
+    def set(self, **kwargs: Any) -> "StateBatch":
+        self.payload.update(kwargs)
+        return self
+    
+    def on(self) -> "StateBatch":
+        return self.set(on=True)
+    
+    def off(self) -> "StateBatch":
+        return self.set(on=False)
+    
+    @range_check(name="bri", start=1, end=254, exception=BrightnessRangeException)
+    def brightness(self, val: int) -> "StateBatch":
+        return self.set(bri=val)
+    
+    @range_check(name="hue", start=0, end=65535, exception=HueRangeException)
+    def hue(self, val: int) -> "StateBatch":
+        return self.set(hue=val)
+    
+    @range_check(name="sat", start=0, end=254, exception=SaturationRangeException)
+    def saturation(self, val: int) -> "StateBatch":
+        return self.set(sat=val)
+    
+    def alert(self, alert_type: str = "select") -> "StateBatch":
+        return self.set(alert=alert_type)
+    
+    def effect(self, mode: str = "colorloop") -> "StateBatch":
+        return self.set(effect=mode)
+    
+    def transitiontime(self, val: int) -> "StateBatch":
+        return self.set(transitiontime=val)
+    
+    def xy(self, x: float, y: float) -> "StateBatch":
+        return self.set(xy=[x, y])
+    
+    def _gamut(self, gamut: Optional[str]) -> Optional[str]:
+        return gamut or (self.gamut() if self.gamut is not None else None)
+    
+    def rgb(self, r: int, g: int, b: int, gamut: Optional[str] = None) -> "StateBatch":
+        x, y = rgb2xy(r, g, b, gamut=self._gamut(gamut))
+        return self.xy(x, y)
+    
+    def rgbhex(self, color_code: str, gamut: Optional[str] = None) -> "StateBatch":
+        x, y = hex2xy(color_code, gamut=self._gamut(gamut))
+        return self.xy(x, y)
@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, NamedTuple, Tuple
+
+from .hue import Hue
+from .simulator import FakeBridge
+from . import color, util
+
+IMPORT_BUDGET_MS: float = 300.0
+# RSS added on top of a bare interpreter, so the budget does not depend on the Python build.
+# About 19 MB is measured here, importing pandas as well would add about 50 MB more.
+IMPORT_BUDGET_MB: float = 40.0
+HEAVY_MODULES: Tuple[str, ...] = ("pandas", "numpy", "yaml", "aiohttp", "mbedtls")
+_IMPORT_PROBE: str = """
+import json, resource, sys, time
+
+def rss():
+    # Current RSS in MB (Linux), the peak RSS elsewhere
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+baseline = rss()
+start = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": seconds,
+    "mb": rss() - baseline,
+    "heavy": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+class Result(NamedTuple):
+    name: str
+    ops: int
+    seconds: float
+    p50: float
+    p99: float
+    
+    @property
+    def ops_per_sec(self) -> float:
+        return self.ops / self.seconds if self.seconds else 0.0
+    
+    def row(self) -> str:
+        return f"{self.name:<28}{self.ops:>8}{self.ops_per_sec:>14.1f}{self.p50 * 1e3:>12.3f}{self.p99 * 1e3:>12.3f}"
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered: List[float] = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def measure(name: str, fx: Callable[[], object], iterations: int, ops_per_call: int = 1) -> Result:
+    latencies: List[float] = []
+    start: float = time.perf_counter()
+    for _ in range(iterations):
+        t: float = time.perf_counter()
+        fx()
+        latencies.append(time.perf_counter() - t)
+    seconds: float = time.perf_counter() - start
+    return Result(name, iterations * ops_per_call, seconds, percentile(latencies, 0.5), percentile(latencies, 0.99))
+
+
+def bench_single(hue: Hue, iterations: int) -> Result:
+    return measure("single lights.on", lambda: hue.lights.on(1), iterations)
+
+
+def bench_fanout(hue: Hue, light_ids: List[str], workers: int, iterations: int) -> Result:
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def fanout() -> None:
+            list(executor.map(lambda light_id: hue.lights.rgb(light_id, 255, 128, 0), light_ids))
+        
+        return measure(f"fan-out x{len(light_ids)} (threads)", fanout, iterations, len(light_ids))
+
+
+def bench_async_fanout(bridge: FakeBridge, light_ids: List[str], iterations: int) -> Result:
+    from .async_hue import AsyncHue
+    
+    async def run() -> Result:
+        async with AsyncHue(ip=bridge.ip, user_name=bridge.user_name, max_in_flight=len(light_ids)) as hue:
+            hue.lights.load_gamuts(await hue.all.lights())
+            latencies: List[float] = []
+            start: float = time.perf_counter()
+            for _ in range(iterations):
+                t: float = time.perf_counter()
+                await asyncio.gather(*[hue.lights.rgb(light_id, 255, 128, 0) for light_id in light_ids])
+                latencies.append(time.perf_counter() - t)
+            seconds: float = time.perf_counter() - start
+        return Result(f"fan-out x{len(light_ids)} (asyncio)", iterations * len(light_ids), seconds,
+                      percentile(latencies, 0.5), percentile(latencies, 0.99))
+    
+    return asyncio.run(run())
+
+
+def bench_dataframe(res: dict, iterations: int) -> List[Result]:
+    return [
+        measure("to_dataframe json_normalize", lambda: Hue.to_dataframe(res, id_exists=True), iterations),
+        measure("to_dataframe schema", lambda: Hue.to_dataframe(res, resource="lights"), iterations),
+    ]
+
+
+def bench_rgb2xy(iterations: int, batch: int = 1000) -> List[Result]:
+    colors = [((n * 37) % 256, (n * 91) % 256, (n * 13) % 255 + 1) for n in range(batch)]
+    return [
+        measure("rgb2xy single", lambda: util.rgb2xy(255, 128, 0), iterations * batch),
+        measure(f"rgb2xy_batch x{batch}", lambda: color.rgb2xy_batch(colors), iterations, batch),
+    ]
+
+
+def bench_import(statement: str = "from hue.hue import Hue", runs: int = 5) -> Tuple[Result, float, List[str]]:
+    """
+    Import in fresh interpreters.
+    :return: (timing, MB of RSS added by the import, heavy modules that were loaded)
+    """
+    probe: str = _IMPORT_PROBE.format(statement=statement, heavy=HEAVY_MODULES)
+    samples: List[dict] = [
+        json.loads(subprocess.run([sys.executable, "-c", probe], check=True, capture_output=True, text=True).stdout)
+        for _ in range(runs)
+    ]
+    latencies: List[float] = [sample["seconds"] for sample in samples]
+    result = Result(statement, runs, sum(latencies), percentile(latencies, 0.5), percentile(latencies, 0.99))
+    return result, max(sample["mb"] for sample in samples), sorted({name for sample in samples for name in sample["heavy"]})
+
+
+def check_import_budget(max_ms: float = IMPORT_BUDGET_MS, max_mb: float = IMPORT_BUDGET_MB,
+                        runs: int = 5) -> List[str]:
+    """
+    :return: The violations of the import budget of hue.hue, empty when it is met
+    """
+    result, mb, heavy = bench_import(runs=runs)
+    violations: List[str] = []
+    if result.p50 * 1e3 > max_ms:
+        violations.append(f"import took {result.p50 * 1e3:.1f} ms (budget {max_ms:.0f} ms)")
+    if mb > max_mb:
+        violations.append(f"import added {mb:.1f} MB of RSS (budget {max_mb:.0f} MB)")
+    if heavy:
+        violations.append(f"optional modules loaded on import: {', '.join(heavy)}")
+    return violations
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Benchmark hue-sdk-py against a local bridge simulator")
+    parser.add_argument("-l", "--lights", type=int, default=50, help="Number of simulated lights")
+    parser.add_argument("-n", "--iterations", type=int, default=200, help="Iterations per benchmark")
+    parser.add_argument("-w", "--workers", type=int, default=util.DEFAULT_POOL_SIZE, help="Threads for the fan-out")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated bridge latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Simulated latency jitter in seconds")
+    parser.add_argument("--imports", action="store_true",
+                        help="Only check the import time and memory budget of hue.hue, exit 1 when exceeded")
+    parser.add_argument("--max-import-ms", type=float, default=IMPORT_BUDGET_MS, help="Import time budget")
+    parser.add_argument("--max-import-mb", type=float, default=IMPORT_BUDGET_MB, help="Budget of the RSS added by the import")
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    if args.imports:
+        violations: List[str] = check_import_budget(args.max_import_ms, args.max_import_mb)
+        for violation in violations:
+            print(violation)
+        if violations:
+            sys.exit(1)
+        print("hue.hue import is within budget")
+        return
+    results: List[Result] = []
+    with FakeBridge(lights=args.lights, latency=args.latency, jitter=args.jitter) as bridge:
+        with Hue(ip=bridge.ip, user_name=bridge.user_name, pool_size=args.workers) as hue:
+            lights: dict = hue.all.lights()
+            light_ids: List[str] = list(lights)
+            hue.lights.load_gamuts(lights)
+            fanout_iterations: int = max(1, args.iterations // len(light_ids))
+            results.append(bench_single(hue, args.iterations))
+            results.append(bench_fanout(hue, light_ids, args.workers, fanout_iterations))
+            try:
+                results.append(bench_async_fanout(bridge, light_ids, fanout_iterations))
+            except ImportError:
+                pass
+            try:
+                results.extend(bench_dataframe(hue.all.lights(), args.iterations))
+            except ImportError:
+                # pandas is optional (pip install hue-sdk-py[pandas])
+                pass
+    results.extend(bench_rgb2xy(args.iterations))
+    results.append(bench_import()[0])
+    
+    print(f"{'benchmark':<28}{'ops':>8}{'ops/sec':>14}{'p50 ms':>12}{'p99 ms':>12}")
+    for result in results:
+        print(result.row())
+
+
+if __name__ == "__main__":
+    main()
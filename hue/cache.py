@@ -0,0 +1,132 @@
+import copy
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+DEFAULT_TTLS: Dict[str, float] = {
+    "lights": 2.0,
+    "groups": 5.0,
+    "sensors": 1.0,
+    "config": 30.0,
+    "scenes": 60.0,
+    "schedules": 60.0,
+    "rules": 60.0,
+    "resourcelinks": 60.0,
+}
+SKIP_ATTRIBUTES: frozenset = frozenset(("transitiontime", "scene"))
+
+
+def _split(path: str) -> List[str]:
+    return [part for part in path.strip("/").split("/") if part]
+
+
+class StateCache:
+    """
+    In-memory mirror of the bridge state.
+    GET responses are served from memory while they are younger than the TTL of their
+    resource, and successful writes are applied to the mirror from the bridge's
+    [{"success": {"/lights/1/state/on": true}}] entries.
+    """
+    
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, default_ttl: float = 2.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttls: Dict[str, float] = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl: float = default_ttl
+        self.clock = clock
+        self.state: Dict[str, dict] = {}
+        self.updated: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.RLock()
+    
+    def _fresh(self, key: Tuple[str, ...], now: float) -> bool:
+        updated: Optional[float] = self.updated.get(key)
+        return updated is not None and now - updated < self.ttls.get(key[0], self.default_ttl)
+    
+    def get(self, path: str) -> Optional[Union[list, dict]]:
+        """
+        :return: A copy of the cached value, or None if it is missing or stale
+        """
+        parts: List[str] = _split(path)
+        if not parts:
+            return None
+        now: float = self.clock()
+        with self._lock:
+            if not (self._fresh(tuple(parts[:1]), now) or (len(parts) > 1 and self._fresh(tuple(parts[:2]), now))):
+                return None
+            value = self.state.get(parts[0])
+            for part in parts[1:]:
+                if type(value) is not dict or part not in value:
+                    return None
+                value = value[part]
+            return copy.deepcopy(value)
+    
+    def seed(self, full_state: dict) -> None:
+        """
+        :param full_state: The full datastore returned by GET /api/{user_name}
+        """
+        for resource, value in full_state.items():
+            if type(value) is dict:
+                self.put(resource, value)
+    
+    def put(self, path: str, value: Union[list, dict]) -> None:
+        """
+        Store the response of a GET request.
+        """
+        if type(value) is not dict:
+            return
+        parts: List[str] = _split(path)
+        if not parts:
+            return self.seed(value)
+        if len(parts) > 2:
+            return
+        now: float = self.clock()
+        with self._lock:
+            if len(parts) == 1:
+                self.state[parts[0]] = copy.deepcopy(value)
+            else:
+                self.state.setdefault(parts[0], {})[parts[1]] = copy.deepcopy(value)
+            self.updated[tuple(parts)] = now
+    
+    def apply(self, path: str, method: str, res: Union[list, dict]) -> None:
+        """
+        Update the mirror after a PUT/POST/DELETE request.
+        """
+        parts: List[str] = _split(path)
+        if method != "PUT" or type(res) is not list:
+            return self.invalidate(parts[0] if parts else None)
+        with self._lock:
+            for item in res:
+                if type(item) is dict and type(success := item.get("success")) is dict:
+                    for address, value in success.items():
+                        self._write(_split(address), value)
+        
+        # Group actions and scene recalls change the state of the member lights
+        if parts and parts[0] == "groups":
+            self.invalidate("lights")
+    
+    def _write(self, parts: List[str], value: object) -> None:
+        if len(parts) < 2 or parts[-1] in SKIP_ATTRIBUTES:
+            return
+        node = self.state.get(parts[0], {}).get(parts[1])
+        if type(node) is not dict:
+            return
+        for part in parts[2:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+    
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """
+        :param path: "lights" drops all lights, "lights/1" drops one light, None drops everything
+        """
+        with self._lock:
+            if path is None:
+                self.state.clear()
+                self.updated.clear()
+                return
+            parts: List[str] = _split(path)[:2]
+            if len(parts) == 1:
+                self.state.pop(parts[0], None)
+                self.updated = {k: v for k, v in self.updated.items() if k[0] != parts[0]}
+            elif len(parts) == 2:
+                self.state.get(parts[0], {}).pop(parts[1], None)
+                self.updated.pop(tuple(parts), None)
+                self.updated.pop(tuple(parts[:1]), None)
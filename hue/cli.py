@@ -0,0 +1,188 @@
+"""
+Thin client of the hued daemon. Only the standard library is imported here so that each
+command costs an interpreter start and one round trip on the Unix socket.
+
+hue lights.on 1
+hue groups.action 0 payload='{"on": false}'
+hue --batch commands.txt    (or - for stdin, one command or JSON request per line)
+"""
+import argparse
+import contextlib
+import json
+import os
+import queue
+import shlex
+import socket
+import sys
+import tempfile
+import threading
+from typing import Iterable, Iterator, List, Optional
+
+DEFAULT_SOCKET: str = os.environ.get(
+    "HUED_SOCKET", os.path.join(tempfile.gettempdir(), f"hued-{os.getuid()}.sock")
+)
+
+
+def _value(text: str):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def parse_command(tokens: List[str]) -> dict:
+    """
+    ["lights.brightness", "1", "val=200"] -> {"call": "lights.brightness", "args": [1], "kwargs": {"val": 200}}
+    Values are read as JSON when possible and as strings otherwise.
+    """
+    request: dict = {"call": tokens[0], "args": [], "kwargs": {}}
+    for token in tokens[1:]:
+        key, sep, value = token.partition("=")
+        if sep and key.isidentifier():
+            request["kwargs"][key] = _value(value)
+        else:
+            request["args"].append(_value(token))
+    return request
+
+
+def parse_line(line: str) -> Optional[dict]:
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith("{"):
+        return json.loads(line)
+    return parse_command(shlex.split(line))
+
+
+def parse_batch(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    :raise ValueError: A line is not a command or a JSON request, the message gives its number
+    """
+    for number, line in enumerate(lines, 1):
+        try:
+            request: Optional[dict] = parse_line(line)
+        except ValueError as e:
+            raise ValueError(f"line {number}: {e}") from e
+        if request is not None:
+            yield request
+
+
+class Client:
+    """
+    JSON-lines connection to hued. Requests are pipelined: send() does not wait for the response.
+    """
+    
+    def __init__(self, path: str = DEFAULT_SOCKET, timeout: Optional[float] = None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self.rfile = self.sock.makefile("rb")
+        self.wfile = self.sock.makefile("wb")
+    
+    def __enter__(self) -> "Client":
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        self.rfile.close()
+        self.wfile.close()
+        self.sock.close()
+    
+    def send(self, request: dict) -> None:
+        self.wfile.write(json.dumps(request).encode("utf-8") + b"\n")
+    
+    def flush(self) -> None:
+        self.wfile.flush()
+    
+    def receive(self) -> dict:
+        line: bytes = self.rfile.readline()
+        if not line:
+            raise ConnectionError("hued closed the connection")
+        return json.loads(line)
+    
+    def call(self, name: str, *args, **kwargs):
+        self.send({"call": name, "args": list(args), "kwargs": kwargs})
+        self.flush()
+        response: dict = self.receive()
+        if not response.get("ok"):
+            raise RuntimeError(f"{response.get('type')}: {response.get('error')}")
+        return response.get("result")
+    
+    def stream(self, requests: Iterable[dict]) -> Iterator[dict]:
+        """
+        Send the requests from a writer thread while yielding the responses in order.
+        """
+        sent: queue.Queue = queue.Queue()
+        errors: List[BaseException] = []
+        
+        def write() -> None:
+            try:
+                for request in requests:
+                    self.send(request)
+                    self.flush()
+                    sent.put(True)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                sent.put(None)
+        
+        writer = threading.Thread(target=write, name="hue-cli-writer", daemon=True)
+        writer.start()
+        while sent.get() is not None:
+            yield self.receive()
+        writer.join()
+        if errors:
+            raise errors[0]
+
+
+def get_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Send commands to the hued daemon, e.g. hue lights.on 1")
+    parser.add_argument("-s", "--socket", type=str, default=DEFAULT_SOCKET, help="Unix socket of hued")
+    parser.add_argument("-b", "--batch", type=str, default=None,
+                        help="Read one command per line from a file (- for stdin)")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="resource.method followed by arguments")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = get_args(argv)
+    if args.batch is None and not args.command:
+        print("Give a command or --batch", file=sys.stderr)
+        return 2
+    try:
+        source = contextlib.nullcontext(sys.stdin) if args.batch in (None, "-") else open(args.batch, encoding="utf-8")
+    except OSError as e:
+        print(f"Cannot read {args.batch}: {e}", file=sys.stderr)
+        return 2
+    with source as lines:
+        try:
+            client = Client(args.socket)
+        except OSError as e:
+            print(f"Cannot connect to hued at {args.socket}: {e}", file=sys.stderr)
+            return 2
+        with client:
+            requests: Iterable[dict] = [parse_command(args.command)] if args.batch is None else parse_batch(lines)
+            try:
+                return run(client, requests)
+            except ValueError as e:
+                print(f"{args.batch}: {e}", file=sys.stderr)
+                return 2
+
+
+def run(client: Client, requests: Iterable[dict]) -> int:
+    """
+    Print the result of each request, or the error response of the failed ones.
+    :return: The exit status, 1 when a request failed
+    """
+    failed: int = 0
+    for response in client.stream(requests):
+        if not response.get("ok"):
+            failed += 1
+        print(json.dumps(response.get("result") if response.get("ok") else response, ensure_ascii=False))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
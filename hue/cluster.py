@@ -0,0 +1,155 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, TypeVar, Union
+
+from . import util
+from .hue import Hue
+from .frames import pandas
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+T = TypeVar("T")
+# State kept per bridge (command budget, mirrored state, circuit breaker), one object cannot serve several bridges
+PER_BRIDGE_OPTIONS: frozenset = frozenset(("scheduler", "cache", "resilience"))
+
+
+class HueCluster:
+    """
+    Several bridges driven as one. Every call is sent to the bridges in parallel and
+    the results are returned as {bridge_name: result}. A bridge that fails does not affect
+    the others, its result is the exception it raised (see HueCluster.errors).
+    
+    config.yml:
+        Bridges:
+          lobby: {ip: 192.168.0.10, user_name: ...}
+          floor1: {ip: 192.168.1.10, user_name: ...}
+    """
+    
+    def __init__(self, bridges: Optional[Dict[str, dict]] = None,
+                 per_bridge: Optional[Callable[[str], dict]] = None, **kwargs):
+        """
+        :param bridges: {name: {"ip": ..., "user_name": ...}}, read from config.yml when omitted
+        :param per_bridge: Called with each bridge name, returns the keyword arguments of that bridge's Hue,
+                           e.g. lambda name: {"scheduler": CommandScheduler(), "cache": StateCache()}
+        :param kwargs: Passed to every Hue (pool_size, timeout, metrics, ...)
+        """
+        if shared := PER_BRIDGE_OPTIONS.intersection(kwargs):
+            raise TypeError(f"{', '.join(sorted(shared))} would be shared by every bridge, create them in per_bridge")
+        bridges = bridges if bridges else util.load_bridges()
+        self.bridges: Dict[str, Hue] = {
+            name: Hue(ip=settings["ip"], user_name=settings["user_name"],
+                      **{**kwargs, **(per_bridge(name) if per_bridge is not None else {})})
+            for name, settings in bridges.items()
+        }
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.bridges)), thread_name_prefix="hue-cluster")
+    
+    def __enter__(self) -> "HueCluster":
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        for hue in self.bridges.values():
+            hue.close()
+    
+    def map(self, fx: Callable[[Hue], T], names: Optional[Iterable[str]] = None) -> Dict[str, Union[T, Exception]]:
+        """
+        Run fx(hue) on the bridges in parallel.
+        :param names: Restrict to these bridges
+        """
+        return self._each(lambda name, hue: fx(hue), names)
+    
+    def _each(self, fx: Callable[[str, Hue], T],
+              names: Optional[Iterable[str]] = None) -> Dict[str, Union[T, Exception]]:
+        targets: List[str] = list(names) if names is not None else list(self.bridges)
+        futures = {name: self._executor.submit(fx, name, self.bridges[name]) for name in targets}
+        results: Dict[str, Union[T, Exception]] = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = e
+        return results
+    
+    @staticmethod
+    def errors(res: Dict[str, object]) -> Dict[str, Exception]:
+        """
+        :return: {bridge_name: exception} for the bridges that failed
+        """
+        return {name: value for name, value in res.items() if isinstance(value, Exception)}
+    
+    # Reads
+    def lights(self) -> Dict[str, Union[list, dict]]:
+        return self.map(lambda hue: hue.all.lights())
+    
+    def groups(self) -> Dict[str, Union[list, dict]]:
+        return self.map(lambda hue: hue.all.groups())
+    
+    def sensors(self) -> Dict[str, Union[list, dict]]:
+        return self.map(lambda hue: hue.all.sensors())
+    
+    def scenes(self) -> Dict[str, Union[list, dict]]:
+        return self.map(lambda hue: hue.all.scenes())
+    
+    def schedules(self) -> Dict[str, Union[list, dict]]:
+        return self.map(lambda hue: hue.all.schedules())
+    
+    def rules(self) -> Dict[str, Union[list, dict]]:
+        return self.map(lambda hue: hue.all.rules())
+    
+    def full_state(self) -> Dict[str, Union[list, dict]]:
+        return self.map(lambda hue: hue.all.full_state())
+    
+    # Writes
+    def lights_action(self, targets: Dict[str, List[Union[int, str]]], payload: dict) -> Dict[str, List[Union[list, dict]]]:
+        """
+        :param targets: {bridge_name: [light_id, ...]}
+        """
+        return self._each(
+            lambda name, hue: [hue.lights.action(light_id, payload=payload) for light_id in targets[name]],
+            names=targets,
+        )
+    
+    def groups_action(self, targets: Dict[str, Union[int, str]], payload: dict) -> Dict[str, Union[list, dict]]:
+        """
+        :param targets: {bridge_name: group_id}
+        """
+        return self._each(lambda name, hue: hue.groups.action(targets[name], payload=payload), names=targets)
+    
+    def all_action(self, payload: dict) -> Dict[str, Union[list, dict]]:
+        """
+        Apply the payload to every light of every bridge (group 0).
+        """
+        return self.map(lambda hue: hue.groups.action(0, payload=payload))
+    
+    def all_on(self) -> Dict[str, Union[list, dict]]:
+        return self.all_action({"on": True})
+    
+    def all_off(self) -> Dict[str, Union[list, dict]]:
+        return self.all_action({"on": False})
+    
+    def reconcile(self, spec: Union[str, dict], **kwargs) -> Dict[str, list]:
+        """
+        Reconcile every bridge to the same spec in parallel, see Hue.reconcile.
+        """
+        return self.map(lambda hue: hue.reconcile(spec, **kwargs))
+    
+    @staticmethod
+    def to_dataframe(res: Dict[str, Union[dict, list]], resource: Optional[str] = None) -> "DataFrame":
+        """
+        Merge {bridge_name: result} into one DataFrame with a leading "bridge" column.
+        Bridges that failed are left out.
+        :param resource: "lights", "groups" or "sensors" to use the fixed schema of hue.frames
+        """
+        frames: List["DataFrame"] = []
+        for name, value in res.items():
+            if isinstance(value, Exception):
+                continue
+            df = Hue.to_dataframe(value, id_exists=True, resource=resource)
+            df.insert(0, "bridge", name)
+            frames.append(df)
+        if not frames:
+            return pandas().DataFrame()
+        return pandas().concat(frames, ignore_index=True)
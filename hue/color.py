@@ -0,0 +1,140 @@
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .util import COLOR_CODE_PATTERN
+from .exceptions import (
+    ColorcodeFormatException,
+    ColorcodeRangeException,
+    NoIuminanceException,
+)
+
+HEX_CACHE_SIZE: int = 1024
+
+# sRGB (D65) -> XYZ, adapted to D50 with the Bradford transform
+_SRGB_TO_XYZ = np.array((
+    (0.412424, 0.357579, 0.180464),
+    (0.212656, 0.715158, 0.0721856),
+    (0.0193324, 0.119193, 0.950444),
+))
+_BRADFORD = np.array((
+    (0.8951, 0.2664, -0.1614),
+    (-0.7502, 1.7135, 0.0367),
+    (0.0389, -0.0685, 1.0296),
+))
+_D65 = np.array((0.95047, 1.0, 1.08883))
+_D50 = np.array((0.96422, 1.0, 0.82521))
+_ADAPTATION = np.linalg.inv(_BRADFORD) @ np.diag((_BRADFORD @ _D50) / (_BRADFORD @ _D65)) @ _BRADFORD
+RGB_TO_XYZ: np.ndarray = _ADAPTATION @ _SRGB_TO_XYZ
+
+# Color gamut triangles (red, green, blue vertices in xy)
+GAMUTS: Dict[str, np.ndarray] = {
+    "A": np.array(((0.704, 0.296), (0.2151, 0.7106), (0.138, 0.08))),
+    "B": np.array(((0.675, 0.322), (0.409, 0.518), (0.167, 0.04))),
+    "C": np.array(((0.692, 0.308), (0.17, 0.7), (0.153, 0.048))),
+}
+MODEL_GAMUTS: Dict[str, str] = {
+    **dict.fromkeys(("LST001", "LLC005", "LLC006", "LLC007", "LLC010", "LLC011",
+                     "LLC012", "LLC013", "LLC014"), "A"),
+    **dict.fromkeys(("LCT001", "LCT002", "LCT003", "LCT007", "LLM001"), "B"),
+    **dict.fromkeys(("LCT010", "LCT011", "LCT012", "LCT014", "LCT015", "LCT016",
+                     "LLC020", "LST002", "LCA001", "LCA002", "LCA003"), "C"),
+}
+
+
+def gamut_for_model(modelid: str) -> Optional[str]:
+    return MODEL_GAMUTS.get(modelid)
+
+
+def gamut_for_light(attributes: dict) -> Optional[str]:
+    """
+    :param attributes: Response of Lights.get_attributes or one value of All.lights
+    :return: "A", "B", "C" or None when the light has no known color gamut
+    """
+    if type(attributes) is not dict:
+        # An error response, e.g. the light was deleted
+        return None
+    control: dict = attributes.get("capabilities", {}).get("control", {})
+    if (gamut := control.get("colorgamuttype")) in GAMUTS:
+        return gamut
+    return gamut_for_model(attributes.get("modelid", ""))
+
+
+def _closest_on_segment(xy: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    ab = b - a
+    t = np.clip(((xy - a) @ ab) / (ab @ ab), 0.0, 1.0)
+    return a + t[:, None] * ab
+
+
+def clip_to_gamut(xy: np.ndarray, gamut: str) -> np.ndarray:
+    """
+    Move the points outside the gamut triangle to the closest point on its edges.
+    :param xy: Array of shape (N, 2)
+    :param gamut: "A", "B" or "C"
+    """
+    red, green, blue = GAMUTS[gamut]
+    
+    # Barycentric test for the points inside the triangle
+    v0, v1, v2 = green - red, blue - red, xy - red
+    d00, d01, d11 = v0 @ v0, v0 @ v1, v1 @ v1
+    d20, d21 = v2 @ v0, v2 @ v1
+    denom = d00 * d11 - d01 * d01
+    v = (d11 * d20 - d01 * d21) / denom
+    w = (d00 * d21 - d01 * d20) / denom
+    inside = (v >= 0) & (w >= 0) & (v + w <= 1)
+    if inside.all():
+        return xy
+    
+    candidates = np.stack([
+        _closest_on_segment(xy, red, green),
+        _closest_on_segment(xy, green, blue),
+        _closest_on_segment(xy, blue, red),
+    ])
+    nearest = np.argmin(((candidates - xy) ** 2).sum(axis=2), axis=0)
+    clipped = candidates[nearest, np.arange(len(xy))]
+    return np.where(inside[:, None], xy, clipped)
+
+
+def rgb2xy_batch(rgb: Iterable[Sequence[int]], gamut: Optional[str] = None) -> np.ndarray:
+    """
+    :param rgb: RGB values between 0 and 255, shape (N, 3)
+    :param gamut: Clip the result to the gamut "A", "B" or "C" when given
+    :return: Array of xy values, shape (N, 2)
+    """
+    arr = np.asarray(rgb, dtype=np.float64).reshape(-1, 3)
+    if ((arr < 0) | (arr > 255)).any():
+        raise ColorcodeRangeException
+    if (arr.sum(axis=1) == 0).any():
+        raise NoIuminanceException
+    
+    # Inverse sRGB companding, then linear RGB -> XYZ -> xy
+    arr /= 255.0
+    linear = np.where(arr <= 0.04045, arr / 12.92, ((arr + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ RGB_TO_XYZ.T
+    xy = xyz[:, :2] / xyz.sum(axis=1, keepdims=True)
+    if gamut is not None:
+        xy = clip_to_gamut(xy, gamut)
+    return xy
+
+
+def hex2rgb_batch(color_codes: Iterable[str]) -> np.ndarray:
+    """
+    :return: Array of RGB values, shape (N, 3)
+    """
+    codes: list = list(color_codes)
+    for color_code in codes:
+        if not COLOR_CODE_PATTERN.match(color_code):
+            raise ColorcodeFormatException
+    values = np.array([int(color_code[1:], 16) for color_code in codes], dtype=np.int64)
+    return np.stack([(values >> 16) & 0xFF, (values >> 8) & 0xFF, values & 0xFF], axis=1)
+
+
+def hex2xy_batch(color_codes: Iterable[str], gamut: Optional[str] = None) -> np.ndarray:
+    return rgb2xy_batch(hex2rgb_batch(color_codes), gamut=gamut)
+
+
+@lru_cache(maxsize=HEX_CACHE_SIZE)
+def hex2xy(color_code: str, gamut: Optional[str] = None) -> Tuple[float, float]:
+    x, y = hex2xy_batch([color_code], gamut=gamut)[0]
+    return float(x), float(y)
@@ -1,9 +1,10 @@
 import argparse
+from typing import Dict, List, Optional, Union
 
 import requests
-from retry import retry
 
 from . import util
+from .discovery import Bridge, discover, pair_all
 from .exceptions import (
     DeviceTypeException,
     ButtonNotPressedException,
@@ -14,47 +15,95 @@ def get_args():
     parser = argparse.ArgumentParser(
         description="Make a request to the specified endpoint and attempt to connect Python to the Hue Bridge"
     )
-    parser.add_argument("-i", "--ip", type=str, required=True, help="IP address of Hue Bridge")
+    parser.add_argument("-i", "--ip", type=str, required=False, default=None,
+                        help="IP address of Hue Bridge, the bridges on the network are discovered when omitted")
     parser.add_argument("-d", "--domain", type=bool,
                         required=False, default=True,
                         help="If you want to specify a domain instead of an IP, set this argument to False")
+    parser.add_argument("-b", "--budget", type=float, default=util.DISCOVERY_BUDGET,
+                        help="Seconds spent discovering bridges")
+    parser.add_argument("-n", "--network", type=str, default=None,
+                        help="Subnet probed for bridges, e.g. 192.168.1.0/24 (the local /24 by default)")
+    parser.add_argument("--no-scan", action="store_true", help="Only use SSDP and mDNS to discover bridges")
     return parser.parse_args()
 
 
-@retry(
-    delay=util.AUTH_FAILURE_SLEEP,
-    tries=util.AUTH_FAILURE_RETRIES,
-    exceptions=ButtonNotPressedException,
-)
+def find_bridges(args) -> List[Bridge]:
+    """
+    :return: The bridge given with -i, or the bridges discovered on the network
+    """
+    if args.ip is not None:
+        if args.domain:
+            util.ip_reg(args.ip)
+        return [Bridge(args.ip, "", "", "", "", "argument")]
+    print(f"Discovering Hue Bridges for {args.budget:.0f} seconds...")
+    bridges: List[Bridge] = discover(args.budget, network=False if args.no_scan else args.network)
+    for bridge in bridges:
+        print(f"Found {bridge.name} ({bridge.bridgeid}) at {bridge.ip} via {bridge.source}")
+    return bridges
+
+
+def report_failures(results: Dict[str, Union[dict, Exception]]) -> Dict[str, Exception]:
+    """
+    Print why each bridge failed to pair.
+    :return: {ip: exception}
+    """
+    failures: Dict[str, Exception] = {ip: res for ip, res in results.items() if isinstance(res, Exception)}
+    for ip, error in failures.items():
+        if isinstance(error, requests.RequestException):
+            print(f"Could not reach the Hue Bridge at {ip}: {error}")
+        else:
+            print(f"{getattr(error, 'msg', error)} ({ip})")
+    return failures
+
+
+def save_auth(paired: Dict[str, dict], ip: Optional[str] = None) -> dict:
+    """
+    :param ip: The bridge given with -i, saved as the default Auth
+    :return: The settings written to config.yml
+    """
+    yc = util.YamlConfig()
+    settings: dict = (yc.load() or {}) if yc.exists() else {}
+    if ip is not None:
+        settings["Auth"] = paired[ip]
+    else:
+        settings["Bridges"] = {**settings.get("Bridges", {}), **paired}
+    yc.write(settings)
+    return settings
+
+
 def main():
-    # Get an IP address.
+    # Get the IP addresses.
     args = get_args()
-    ip: str = args.ip
-    if args.domain:
-        util.ip_reg(ip)
+    bridges: List[Bridge] = find_bridges(args)
+    if not bridges:
+        print("No Hue Bridge was found. Give its IP address with -i, please.")
+        return
+    
+    # Attempt to authenticate with all the Hue Bridges at once
+    print("Press the link button of each Hue Bridge.")
+    waiting = set()
     
-    # Attempt to authenticate with Hue Bridge
-    payload: dict = {"devicetype": "hue_cli"}
-    url: str = f"http://{ip}/api"
-    res: dict = requests.post(url, json=payload).json()[0]
+    def on_waiting(ip: str) -> None:
+        if ip not in waiting:
+            waiting.add(ip)
+            print(f"{ButtonNotPressedException.msg} ({ip})")
     
-    # Error handling
-    if error := res.get("error"):
-        if error["type"] == 1:
-            raise DeviceTypeException
-        print(ButtonNotPressedException.msg)
+    results: Dict[str, Union[dict, Exception]] = pair_all([bridge.ip for bridge in bridges], on_waiting=on_waiting)
+    
+    # Error handling, the bridges that paired are saved even if others failed
+    failures: Dict[str, Exception] = report_failures(results)
+    paired: Dict[str, dict] = {
+        bridge.bridgeid or bridge.ip: results[bridge.ip] for bridge in bridges if type(results[bridge.ip]) is dict
+    }
+    if not paired:
+        for kind in (DeviceTypeException, requests.RequestException):
+            if error := next((e for e in failures.values() if isinstance(e, kind)), None):
+                raise error
         raise ButtonNotPressedException
     
     # Exporting authentication information
-    user_name = res["success"]["username"]
-    settings: dict = {
-        "Auth": {
-            "ip": ip,
-            "user_name": user_name
-        }
-    }
-    yc = util.YamlConfig()
-    yc.write(settings)
+    settings: dict = save_auth(paired, args.ip)
     
     # Output for console
     print("The authentication information has been registered as follows.")
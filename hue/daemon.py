@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+from typing import Callable, FrozenSet, Optional
+
+from .cli import DEFAULT_SOCKET
+from .hue import Hue
+from .cache import StateCache
+from . import util
+
+RESOURCES: FrozenSet[str] = frozenset(("all", "lights", "groups", "scenes", "schedules", "sensors", "rules"))
+HUE_METHODS: FrozenSet[str] = frozenset(("request", "apply_states", "reconcile"))
+EXCLUDED_METHODS: FrozenSet[str] = frozenset(("batch",))
+
+
+def resolve(hue: Hue, name: str) -> Callable:
+    """
+    Map "lights.on" to hue.lights.on. Only public methods of the resources and a few Hue methods are reachable.
+    """
+    resource, _, method = name.partition(".")
+    if not method and resource in HUE_METHODS:
+        return getattr(hue, resource)
+    if resource not in RESOURCES or not method or method.startswith("_") or method in EXCLUDED_METHODS:
+        raise AttributeError(f"{name} is not available")
+    fx = getattr(getattr(hue, resource), method, None)
+    if not callable(fx):
+        raise AttributeError(f"{name} is not available")
+    return fx
+
+
+def handle(hue: Hue, request: dict) -> dict:
+    """
+    {"id": 1, "call": "lights.on", "args": [1], "kwargs": {}} -> {"id": 1, "ok": true, "result": [...]}
+    """
+    response: dict = {"id": request.get("id")} if "id" in request else {}
+    try:
+        if request.get("call") == "ping":
+            result = "pong"
+        else:
+            result = resolve(hue, request["call"])(*request.get("args", []), **request.get("kwargs", {}))
+        response.update(ok=True, result=result)
+    except Exception as e:
+        response.update(ok=False, type=type(e).__name__, error=str(e))
+    return response
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class HueDaemon:
+    """
+    Keeps one Hue client (connection pool, cache, scheduler) warm and serves JSON-lines requests
+    on a Unix socket. Each connection may pipeline any number of requests; they run in order.
+    """
+    
+    def __init__(self, hue: Hue, path: str = DEFAULT_SOCKET):
+        self.hue: Hue = hue
+        self.path: str = path
+        self.requests: int = 0
+        self.server: Optional[_Server] = None
+        self._lock = threading.Lock()
+    
+    def _handler(self):
+        daemon = self
+        
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    try:
+                        request = json.loads(line)
+                        if type(request) is not dict:
+                            raise ValueError(f"A request is a JSON object, got {type(request).__name__}")
+                        response: dict = handle(daemon.hue, request)
+                    except ValueError as e:
+                        response = {"ok": False, "type": type(e).__name__, "error": str(e)}
+                    with daemon._lock:
+                        daemon.requests += 1
+                    try:
+                        data: bytes = json.dumps(response).encode("utf-8")
+                    except TypeError as e:
+                        data = json.dumps({"id": response.get("id"), "ok": False, "type": type(e).__name__,
+                                           "error": str(e)}).encode("utf-8")
+                    self.wfile.write(data + b"\n")
+                    self.wfile.flush()
+        
+        return Handler
+    
+    def start(self) -> "HueDaemon":
+        if os.path.exists(self.path):
+            if self._alive():
+                raise RuntimeError(f"Another hued is already listening on {self.path}")
+            # A stale socket of a previous run
+            os.unlink(self.path)
+        # Created as 0600 from the start, no other user can connect before a chmod
+        umask: int = os.umask(0o077)
+        try:
+            self.server = _Server(self.path, self._handler())
+        finally:
+            os.umask(umask)
+        return self
+    
+    def _alive(self) -> bool:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(self.path)
+            except OSError:
+                return False
+        return True
+    
+    def serve_forever(self) -> None:
+        self.server.serve_forever()
+    
+    def shutdown(self) -> None:
+        self.server.shutdown()
+    
+    def close(self) -> None:
+        if self.server is not None:
+            self.server.server_close()
+            self.server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+    
+    def __enter__(self) -> "HueDaemon":
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Keep a Hue client open and serve commands on a Unix socket")
+    parser.add_argument("-s", "--socket", type=str, default=DEFAULT_SOCKET, help="Path of the Unix socket")
+    parser.add_argument("-p", "--pool-size", type=int, default=util.DEFAULT_POOL_SIZE, help="Connection pool size")
+    parser.add_argument("-c", "--cache", action="store_true", help="Serve reads from a state cache")
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    cache: Optional[StateCache] = StateCache() if args.cache else None
+    with Hue(pool_size=args.pool_size, cache=cache) as hue, HueDaemon(hue, args.socket) as daemon:
+        def stop(signum, frame) -> None:
+            # shutdown() waits for serve_forever(), which runs in this thread
+            threading.Thread(target=daemon.shutdown, daemon=True).start()
+        
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        print(f"hued listening on {args.socket}")
+        daemon.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
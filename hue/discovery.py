@@ -0,0 +1,289 @@
+import ipaddress
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Union
+from urllib.parse import urlparse
+
+import requests
+
+from . import util
+from .exceptions import ButtonNotPressedException, DeviceTypeException
+
+SSDP_REQUEST: bytes = "\r\n".join((
+    "M-SEARCH * HTTP/1.1",
+    "HOST: 239.255.255.250:1900",
+    'MAN: "ssdp:discover"',
+    "MX: 2",
+    "ST: ssdp:all",
+    "", "",
+)).encode("ascii")
+MDNS_SERVICE: str = "_hue._tcp.local"
+
+
+class Bridge(NamedTuple):
+    ip: str
+    bridgeid: str
+    name: str
+    modelid: str
+    apiversion: str
+    source: str  # "ssdp", "mdns" or "scan"
+
+
+def probe(ip: str, timeout: float = util.PROBE_TIMEOUT, source: str = "scan") -> Optional[Bridge]:
+    """
+    Read the unauthenticated /api/config of a host.
+    :return: The bridge, or None when the host does not answer like one
+    """
+    try:
+        config = requests.get(f"http://{ip}/api/config", timeout=timeout).json()
+    except (requests.RequestException, ValueError):
+        return None
+    if type(config) is not dict or "bridgeid" not in config or "modelid" not in config:
+        return None
+    return Bridge(ip, config["bridgeid"], config.get("name", ""), config["modelid"],
+                  config.get("apiversion", ""), source)
+
+
+def _remaining(deadline: float) -> float:
+    return max(0.0, deadline - time.monotonic())
+
+
+def _receive(sock: socket.socket, deadline: float) -> Iterable[tuple]:
+    """
+    Yield (data, address) until the deadline.
+    """
+    while (remaining := _remaining(deadline)) > 0:
+        sock.settimeout(remaining)
+        try:
+            yield sock.recvfrom(65535)
+        except socket.timeout:
+            return
+        except OSError:
+            return
+
+
+def ssdp_search(deadline: float, address: tuple = util.SSDP_ADDRESS) -> Iterator[str]:
+    """
+    Yield the hosts (with the port when it is not 80) announced by answers carrying hue-bridgeid or IpBridge,
+    as they arrive and until the deadline.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP) as sock:
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+        sock.sendto(SSDP_REQUEST, address)
+        for data, sender in _receive(sock, deadline):
+            text: str = data.decode("utf-8", "replace")
+            headers: Dict[str, str] = {}
+            for line in text.split("\r\n")[1:]:
+                key, sep, value = line.partition(":")
+                if sep:
+                    headers[key.strip().lower()] = value.strip()
+            if "hue-bridgeid" not in headers and "IpBridge" not in headers.get("server", ""):
+                continue
+            netloc: str = urlparse(headers.get("location", "")).netloc or sender[0]
+            yield netloc[:-3] if netloc.endswith(":80") else netloc
+
+
+def _mdns_query(service: str = MDNS_SERVICE) -> bytes:
+    question: bytes = b"".join(bytes((len(label),)) + label.encode("ascii") for label in service.split("."))
+    # PTR, IN with the unicast-response bit
+    return struct.pack("!6H", 0, 0, 1, 0, 0, 0) + question + b"\x00" + struct.pack("!2H", 12, 0x8001)
+
+
+def _skip_name(data: bytes, offset: int) -> int:
+    while offset < len(data):
+        length: int = data[offset]
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        if length == 0:
+            return offset + 1
+        offset += length + 1
+    return offset
+
+
+def _mdns_addresses(data: bytes) -> List[str]:
+    """
+    :return: IPv4 addresses of the A records of an mDNS response
+    """
+    if len(data) < 12:
+        return []
+    questions, answers, authorities, additionals = struct.unpack("!4H", data[4:12])
+    offset: int = 12
+    for _ in range(questions):
+        offset = _skip_name(data, offset) + 4
+    addresses: List[str] = []
+    for _ in range(answers + authorities + additionals):
+        offset = _skip_name(data, offset)
+        if offset + 10 > len(data):
+            break
+        type_, _, _, length = struct.unpack("!HHIH", data[offset:offset + 10])
+        offset += 10
+        if type_ == 1 and length == 4:
+            addresses.append(socket.inet_ntoa(data[offset:offset + 4]))
+        offset += length
+    return addresses
+
+
+def mdns_search(deadline: float, address: tuple = util.MDNS_ADDRESS) -> Iterator[str]:
+    """
+    Yield the addresses of the hosts answering for _hue._tcp.local, as they arrive and until the deadline.
+    """
+    encoded: bytes = b"\x04_hue\x04_tcp"
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP) as sock:
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 255)
+        sock.sendto(_mdns_query(), address)
+        for data, sender in _receive(sock, deadline):
+            if encoded not in data.lower():
+                continue
+            yield from _mdns_addresses(data) or [sender[0]]
+
+
+def local_network(prefix: int = 24) -> Optional[ipaddress.IPv4Network]:
+    """
+    :return: The network of the interface holding the default route
+    """
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            # No packet is sent, connect() only selects the outgoing interface
+            sock.connect(("10.255.255.255", 1))
+            ip: str = sock.getsockname()[0]
+    except OSError:
+        return None
+    return ipaddress.ip_network(f"{ip}/{prefix}", strict=False)
+
+
+class Discovery:
+    """
+    Look for bridges with SSDP, mDNS and a bounded probe of /api/config on every host of a subnet,
+    all at once, and return whatever was confirmed within the time budget.
+    Candidates from SSDP and mDNS are confirmed with the same probe so that every result carries its bridgeid.
+    
+    :param network: Subnet to probe (e.g. "192.168.1.0/24"), the local /24 when omitted, False disables the probe
+    :param port: Port of /api/config on the candidates, for stand-in bridges on localhost
+    :param on_found: Called from a worker thread with each new bridge
+    """
+    
+    def __init__(self, budget: float = util.DISCOVERY_BUDGET, ssdp: bool = True, mdns: bool = True,
+                 network: Union[None, bool, str, ipaddress.IPv4Network] = None, port: Optional[int] = None,
+                 workers: int = util.DISCOVERY_WORKERS, probe_timeout: float = util.PROBE_TIMEOUT,
+                 ssdp_address: tuple = util.SSDP_ADDRESS, mdns_address: tuple = util.MDNS_ADDRESS,
+                 on_found: Optional[Callable[[Bridge], None]] = None):
+        self.budget: float = budget
+        self.ssdp: bool = ssdp
+        self.mdns: bool = mdns
+        self.network = network
+        self.port: Optional[int] = port
+        self.workers: int = workers
+        self.probe_timeout: float = probe_timeout
+        self.ssdp_address: tuple = ssdp_address
+        self.mdns_address: tuple = mdns_address
+        self.on_found = on_found
+        self.bridges: Dict[str, Bridge] = {}
+        self._probed: Set[str] = set()
+        self._lock = threading.Lock()
+        self._deadline: float = 0.0
+    
+    def _host(self, host: str) -> str:
+        if self.port is None or ":" in host:
+            return host
+        return f"{host}:{self.port}"
+    
+    def _probe(self, host: str, source: str) -> None:
+        host = self._host(host)
+        with self._lock:
+            if host in self._probed:
+                return
+            self._probed.add(host)
+        if (remaining := _remaining(self._deadline)) <= 0:
+            return
+        # The timeout applies to connect and read separately
+        if (bridge := probe(host, timeout=min(self.probe_timeout, remaining / 2), source=source)) is None:
+            return
+        with self._lock:
+            if bridge.bridgeid in self.bridges:
+                return
+            self.bridges[bridge.bridgeid] = bridge
+        if self.on_found is not None:
+            self.on_found(bridge)
+    
+    def _hosts(self) -> List[str]:
+        if self.network is False:
+            return []
+        network = local_network() if self.network is None else ipaddress.ip_network(self.network, strict=False)
+        return [str(host) for host in network.hosts()] if network is not None else []
+    
+    def run(self) -> List[Bridge]:
+        self._deadline = time.monotonic() + self.budget
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hue-discovery")
+        
+        def search(fx: Callable[[float, tuple], Iterator[str]], address: tuple, source: str) -> None:
+            for host in fx(self._deadline, address):
+                self._probe(host, source)
+        
+        futures = []
+        if self.ssdp:
+            futures.append(executor.submit(search, ssdp_search, self.ssdp_address, "ssdp"))
+        if self.mdns:
+            futures.append(executor.submit(search, mdns_search, self.mdns_address, "mdns"))
+        futures += [executor.submit(self._probe, host, "scan") for host in self._hosts()]
+        wait(futures, timeout=self.budget)
+        # Probes still queued at the deadline return immediately
+        executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            return sorted(self.bridges.values(), key=lambda bridge: bridge.bridgeid)
+
+
+def discover(budget: float = util.DISCOVERY_BUDGET, **kwargs) -> List[Bridge]:
+    """
+    :param kwargs: Passed to Discovery
+    :return: The bridges found within `budget` seconds
+    """
+    return Discovery(budget=budget, **kwargs).run()
+
+
+def pair(ip: str, devicetype: str = "hue_cli", retries: int = util.AUTH_FAILURE_RETRIES,
+         sleep: float = util.AUTH_FAILURE_SLEEP, timeout: float = util.PROBE_TIMEOUT * 3,
+         on_waiting: Optional[Callable[[str], None]] = None) -> dict:
+    """
+    Create a user on the bridge, retrying while its link button has not been pressed.
+    :return: {"ip": ..., "user_name": ..., "clientkey": ...}
+    """
+    payload: dict = {"devicetype": devicetype, "generateclientkey": True}
+    for attempt in range(retries):
+        res: dict = requests.post(f"http://{ip}/api", json=payload, timeout=timeout).json()[0]
+        if error := res.get("error"):
+            if error["type"] == 1:
+                raise DeviceTypeException
+            if on_waiting is not None:
+                on_waiting(ip)
+            if attempt < retries - 1:
+                time.sleep(sleep)
+            continue
+        auth: dict = {"ip": ip, "user_name": res["success"]["username"]}
+        if clientkey := res["success"].get("clientkey"):
+            # Pre-shared key of the Entertainment streaming (DTLS)
+            auth["clientkey"] = clientkey
+        return auth
+    raise ButtonNotPressedException
+
+
+def pair_all(ips: Iterable[str], **kwargs) -> Dict[str, Union[dict, Exception]]:
+    """
+    Pair with several bridges at once, so one press of each link button is enough.
+    :param kwargs: Passed to pair
+    :return: {ip: auth or the exception raised for that bridge}
+    """
+    targets: List[str] = list(ips)
+    if not targets:
+        return {}
+    
+    def attempt(ip: str) -> Union[dict, Exception]:
+        try:
+            return pair(ip, **kwargs)
+        except Exception as e:
+            return e
+    
+    with ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix="hue-pair") as executor:
+        return dict(zip(targets, executor.map(attempt, targets)))
@@ -0,0 +1,225 @@
+import socket
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from . import util
+from .color import rgb2xy_batch, hex2rgb_batch
+from .exceptions import (
+    DtlsUnavailableException,
+    NoClientKeyException,
+)
+
+HEADER: bytes = b"HueStream"
+COLOR_SPACES: dict = {"rgb": 0x00, "xy": 0x01}
+FRAME_DTYPE = np.dtype([("type", "u1"), ("id", ">u2"), ("color", ">u2", (3,))])
+UINT16_MAX: int = 0xFFFF
+
+
+class FrameBuffer:
+    """
+    Preallocated HueStream v1 message for a fixed list of lights.
+    The colors are written in place through a NumPy view of the buffer.
+    """
+    
+    def __init__(self, light_ids: Sequence[Union[int, str]], color_space: str = "xy"):
+        self.light_ids: List[int] = [int(light_id) for light_id in light_ids]
+        self.color_space: str = color_space
+        self.header_size: int = len(HEADER) + 7
+        self.buffer = bytearray(self.header_size + FRAME_DTYPE.itemsize * len(self.light_ids))
+        self.buffer[:self.header_size] = HEADER + bytes((0x01, 0x00, 0x00, 0x00, 0x00, COLOR_SPACES[color_space], 0x00))
+        self.lights = np.frombuffer(self.buffer, dtype=FRAME_DTYPE, offset=self.header_size)
+        self.lights["type"] = 0x00
+        self.lights["id"] = self.light_ids
+    
+    def set_sequence(self, sequence: int) -> None:
+        self.buffer[len(HEADER) + 2] = sequence & 0xFF
+    
+    def set_rgb(self, rgb: np.ndarray) -> None:
+        """
+        :param rgb: Values between 0 and 255, shape (N, 3)
+        """
+        if self.color_space == "rgb":
+            self.lights["color"] = np.asarray(rgb, dtype=np.float64) * (UINT16_MAX / 255.0)
+            return
+        rgb = np.asarray(rgb, dtype=np.float64).reshape(-1, 3)
+        bri = rgb.max(axis=1) / 255.0
+        lit = bri > 0
+        xy = np.zeros((len(rgb), 2))
+        if lit.any():
+            xy[lit] = rgb2xy_batch(rgb[lit])
+        self.set_xy(xy, bri)
+    
+    def set_xy(self, xy: np.ndarray, bri: Union[float, np.ndarray] = 1.0) -> None:
+        """
+        :param xy: Chromaticity, shape (N, 2)
+        :param bri: Brightness between 0 and 1, scalar or shape (N,)
+        """
+        color = self.lights["color"]
+        color[:, :2] = np.clip(xy, 0.0, 1.0) * UINT16_MAX
+        color[:, 2] = np.clip(bri, 0.0, 1.0) * UINT16_MAX
+    
+    def set_hex(self, color_codes: Iterable[str]) -> None:
+        self.set_rgb(hex2rgb_batch(color_codes))
+
+
+class UdpTransport:
+    """
+    Plain UDP, for local receivers only (the bridge requires DTLS).
+    """
+    
+    def __init__(self, host: str, port: int):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.connect((host, port))
+    
+    def send(self, data: Union[bytes, bytearray]) -> None:
+        self.sock.send(data)
+    
+    def close(self) -> None:
+        self.sock.close()
+
+
+class DtlsTransport:
+    """
+    DTLS 1.2 with a pre-shared key (identity: user name, key: clientkey), using python-mbedtls.
+    """
+    
+    def __init__(self, host: str, port: int, user_name: str, clientkey: str,
+                 timeout: float = util.DEFAULT_TIMEOUT[0]):
+        try:
+            from mbedtls import tls
+        except ImportError:
+            raise DtlsUnavailableException
+        conf = tls.DTLSConfiguration(
+            pre_shared_key=(user_name, bytes.fromhex(clientkey)),
+            ciphers=("TLS-PSK-WITH-AES-128-GCM-SHA256",),
+            validate_certificates=False,
+        )
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.settimeout(timeout)
+        self.sock = tls.ClientContext(conf).wrap_socket(sock, server_hostname=None)
+        try:
+            self.sock.connect((host, port))
+            deadline: float = time.monotonic() + timeout
+            while True:
+                try:
+                    self.sock.do_handshake()
+                    break
+                except (tls.WantReadError, tls.WantWriteError):
+                    if time.monotonic() > deadline:
+                        raise
+        except Exception:
+            self.sock.close()
+            raise
+    
+    def send(self, data: Union[bytes, bytearray]) -> None:
+        self.sock.send(bytes(data))
+    
+    def close(self) -> None:
+        self.sock.close()
+
+
+class EntertainmentStream:
+    """
+    Streams color frames to the lights of an Entertainment group at 25-60 Hz.
+    
+    with EntertainmentStream(hue, group_id=5) as stream:
+        stream.send_rgb(rgb)  # shape (len(stream.light_ids), 3)
+    """
+    
+    def __init__(self, hue, group_id: Union[int, str],
+                 light_ids: Optional[Sequence[Union[int, str]]] = None,
+                 color_space: str = "xy", rate: float = util.STREAM_RATE,
+                 host: Optional[str] = None, port: int = util.STREAM_PORT,
+                 dtls: bool = True, clientkey: Optional[str] = None):
+        self.hue = hue
+        self.group_id: Union[int, str] = group_id
+        if light_ids is None:
+            light_ids = hue.groups.get_attributes(group_id).get("lights", [])
+        self.frame = FrameBuffer(light_ids, color_space=color_space)
+        self.light_ids: List[int] = self.frame.light_ids
+        self.rate: float = rate
+        self.host: str = host if host else hue.ip.split(":")[0]
+        self.port: int = port
+        self.dtls: bool = dtls
+        self.clientkey: Optional[str] = clientkey
+        self.transport: Optional[Union[UdpTransport, DtlsTransport]] = None
+        self.sequence: int = 0
+        self.frames_sent: int = 0
+        self._stop = threading.Event()
+    
+    def __enter__(self) -> "EntertainmentStream":
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+    
+    def start(self) -> "EntertainmentStream":
+        clientkey: Optional[str] = None
+        if self.dtls:
+            clientkey = self.clientkey if self.clientkey else util.load_auth().get("clientkey")
+            if not clientkey:
+                raise NoClientKeyException
+        self.hue.groups.set_attributes(self.group_id, payload={"stream": {"active": True}})
+        try:
+            if self.dtls:
+                self.transport = DtlsTransport(self.host, self.port, self.hue.user_name, clientkey)
+            else:
+                self.transport = UdpTransport(self.host, self.port)
+        except Exception:
+            # The group stays in streaming mode until it is deactivated, do not leave it locked
+            self.hue.groups.set_attributes(self.group_id, payload={"stream": {"active": False}})
+            raise
+        return self
+    
+    def stop(self) -> None:
+        self._stop.set()
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+        self.hue.groups.set_attributes(self.group_id, payload={"stream": {"active": False}})
+    
+    def send(self) -> None:
+        """
+        Send the current content of the frame buffer.
+        """
+        self.frame.set_sequence(self.sequence)
+        self.transport.send(self.frame.buffer)
+        self.sequence = (self.sequence + 1) & 0xFF
+        self.frames_sent += 1
+    
+    def send_rgb(self, rgb: np.ndarray) -> None:
+        self.frame.set_rgb(rgb)
+        self.send()
+    
+    def send_xy(self, xy: np.ndarray, bri: Union[float, np.ndarray] = 1.0) -> None:
+        self.frame.set_xy(xy, bri)
+        self.send()
+    
+    def send_hex(self, color_codes: Iterable[str]) -> None:
+        self.frame.set_hex(color_codes)
+        self.send()
+    
+    def play(self, render: Callable[[float], Optional[np.ndarray]], duration: Optional[float] = None) -> None:
+        """
+        Call render(elapsed_seconds) at the stream rate and send the RGB frame it returns.
+        Stops when render returns None, after `duration` seconds, or when stop() is called.
+        """
+        self._stop.clear()
+        interval: float = 1.0 / self.rate
+        start: float = time.monotonic()
+        deadline: float = start
+        while not self._stop.is_set():
+            elapsed: float = time.monotonic() - start
+            if duration is not None and elapsed >= duration:
+                break
+            if (rgb := render(elapsed)) is None:
+                break
+            self.send_rgb(rgb)
+            deadline += interval
+            if (delay := deadline - time.monotonic()) > 0:
+                self._stop.wait(delay)
+            else:
+                deadline = time.monotonic()
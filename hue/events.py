@@ -0,0 +1,223 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+import requests
+
+from . import util
+
+EVENTSTREAM_PATH: str = "eventstream/clip/v2"
+
+logger = logging.getLogger(__name__)
+
+
+class ServerSentEvent:
+    __slots__ = ("event", "data", "id", "retry")
+    
+    def __init__(self, event: str = "message", data: str = "", id_: Optional[str] = None,
+                 retry: Optional[int] = None):
+        self.event: str = event
+        self.data: str = data
+        self.id: Optional[str] = id_
+        self.retry: Optional[int] = retry
+    
+    def json(self):
+        return json.loads(self.data)
+    
+    def __repr__(self) -> str:
+        return f"ServerSentEvent(event={self.event!r}, id={self.id!r}, data={self.data!r})"
+
+
+class SSEParser:
+    """
+    Incremental parser for the text/event-stream format.
+    Bytes can be fed in chunks of any size; complete events are returned as soon as
+    their terminating blank line has been received.
+    """
+    
+    def __init__(self):
+        self._buffer: bytes = b""
+        self._event: str = "message"
+        self._data: List[str] = []
+        self._id: Optional[str] = None
+        self._retry: Optional[int] = None
+        self.last_event_id: Optional[str] = None
+    
+    def feed(self, chunk: bytes) -> List[ServerSentEvent]:
+        self._buffer += chunk
+        events: List[ServerSentEvent] = []
+        *lines, self._buffer = self._buffer.split(b"\n")
+        for raw in lines:
+            if (event := self._line(raw.rstrip(b"\r").decode("utf-8"))) is not None:
+                events.append(event)
+        return events
+    
+    def _line(self, line: str) -> Optional[ServerSentEvent]:
+        if not line:
+            return self._dispatch()
+        if line.startswith(":"):
+            return None
+        field, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if field == "data":
+            self._data.append(value)
+        elif field == "event":
+            self._event = value
+        elif field == "id":
+            self._id = value
+        elif field == "retry" and value.isdigit():
+            self._retry = int(value)
+        return None
+    
+    def _dispatch(self) -> Optional[ServerSentEvent]:
+        if self._id is not None:
+            self.last_event_id = self._id
+        event: Optional[ServerSentEvent] = None
+        if self._data:
+            event = ServerSentEvent(self._event, "\n".join(self._data), self.last_event_id, self._retry)
+        self._event, self._data, self._id, self._retry = "message", [], None, None
+        return event
+
+
+def iter_updates(event: ServerSentEvent) -> Iterable[dict]:
+    """
+    The bridge sends a JSON list of containers: [{"type": "update", "data": [resource, ...]}, ...]
+    :return: Each changed resource with the container type under "event_type"
+    """
+    for container in event.json():
+        for resource in container.get("data", []):
+            yield {"event_type": container.get("type"), **resource}
+
+
+def _iter_chunks(res: requests.Response) -> Iterable[bytes]:
+    """
+    Yield the body as soon as bytes arrive; iter_content would wait for a full chunk.
+    """
+    if not hasattr(res.raw, "read1"):
+        yield from res.iter_content(chunk_size=None)
+        return
+    while chunk := res.raw.read1(util.EVENTS_CHUNK_SIZE):
+        yield chunk
+
+
+class EventStream:
+    """
+    Subscribes to the CLIP v2 event stream of the bridge.
+    Callbacks are called from a background thread with each updated resource, and
+    `async for update in stream` yields the same updates in an asyncio program.
+    The connection is re-established with exponential backoff and Last-Event-ID.
+    An exception raised by a callback is logged and does not affect the stream or the other callbacks.
+    """
+    
+    def __init__(self, ip: Optional[str] = None, user_name: Optional[str] = None,
+                 url: Optional[str] = None, verify: bool = False,
+                 backoff: float = util.EVENTS_BACKOFF, max_backoff: float = util.EVENTS_MAX_BACKOFF,
+                 read_timeout: float = util.EVENTS_READ_TIMEOUT):
+        if ip is None or user_name is None:
+            settings: dict = util.load_auth()
+            ip = ip if ip else settings["ip"]
+            user_name = user_name if user_name else settings["user_name"]
+        self.url: str = url if url else f"https://{ip}/{EVENTSTREAM_PATH}"
+        self.headers: Dict[str, str] = {"hue-application-key": user_name, "Accept": "text/event-stream"}
+        self.verify: bool = verify
+        self.backoff: float = backoff
+        self.max_backoff: float = max_backoff
+        self.read_timeout: float = read_timeout
+        self.callbacks: List[Callable[[dict], None]] = []
+        self.last_event_id: Optional[str] = None
+        self.reconnects: int = 0
+        self.last_error: Optional[Exception] = None
+        self._session = requests.Session()
+        self._response: Optional[requests.Response] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def subscribe(self, callback: Callable[[dict], None]) -> Callable[[dict], None]:
+        self.callbacks.append(callback)
+        return callback
+    
+    def start(self) -> "EventStream":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="hue-events", daemon=True)
+            self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        self._stop.set()
+        if self._response is not None:
+            self._response.close()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=util.DEFAULT_TIMEOUT[0])
+        self._session.close()
+    
+    def run(self) -> None:
+        """
+        Read the stream until stop() is called, reconnecting after failures.
+        """
+        delay: float = self.backoff
+        while not self._stop.is_set():
+            try:
+                if self._consume():
+                    delay = self.backoff
+            except Exception as e:
+                self.last_error = e
+            if self._stop.is_set():
+                break
+            self.reconnects += 1
+            self._stop.wait(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, self.max_backoff)
+    
+    def _consume(self) -> bool:
+        """
+        :return: True if at least one event was received before the stream ended
+        """
+        headers: Dict[str, str] = dict(self.headers)
+        if self.last_event_id is not None:
+            headers["Last-Event-ID"] = self.last_event_id
+        parser = SSEParser()
+        received: bool = False
+        with self._session.get(self.url, headers=headers, stream=True, verify=self.verify,
+                               timeout=(util.DEFAULT_TIMEOUT[0], self.read_timeout)) as res:
+            self._response = res
+            res.raise_for_status()
+            for chunk in _iter_chunks(res):
+                for event in parser.feed(chunk):
+                    received = True
+                    self.last_event_id = event.id
+                    self._emit(event)
+                if self._stop.is_set():
+                    break
+        self._response = None
+        return received
+    
+    def _emit(self, event: ServerSentEvent) -> None:
+        try:
+            updates: List[dict] = list(iter_updates(event))
+        except (ValueError, AttributeError, TypeError):
+            # Skip a malformed event instead of dropping the connection
+            return
+        for update in updates:
+            for callback in self.callbacks:
+                try:
+                    callback(update)
+                except Exception:
+                    logger.exception("Event callback %r failed", callback)
+    
+    async def __aiter__(self) -> AsyncIterator[dict]:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        def forward(update: dict) -> None:
+            loop.call_soon_threadsafe(queue.put_nowait, update)
+        
+        self.subscribe(forward)
+        self.start()
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.callbacks.remove(forward)
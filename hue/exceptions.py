@@ -13,7 +13,7 @@ class ButtonNotPressedException(Exception):
 class NoConnectionSettingsException(Exception):
     msg: str = "\n".join([
         "The connection to the Hue Bridge has not been set up.",
-        "Use the `hueconn -i={ip_address}` command to connect to the Hue Bridge, please.",
+        "Use the `hueconn` command (or `hueconn -i={ip_address}`) to connect to the Hue Bridge, please.",
     ])
 
 
@@ -52,3 +52,22 @@ class ColorcodeRangeException(Exception):
 class NoIuminanceException(Exception):
     msg: str = "There is no brightness because all RGB are 0. " \
                "Set one of the RGBs to an integer value between 1 and 255, please."
+
+
+class DtlsUnavailableException(Exception):
+    msg: str = "Entertainment streaming requires DTLS. Install python-mbedtls, please (pip install hue-sdk-py[dtls])."
+
+
+class NoClientKeyException(Exception):
+    msg: str = "\n".join([
+        "No clientkey is registered for Entertainment streaming.",
+        "Pair again with `hueconn -i={ip_address}` to generate one, please.",
+    ])
+
+
+class CircuitOpenException(Exception):
+    msg: str = "The Hue Bridge is unreachable, requests are rejected until the circuit breaker resets."
+
+
+class RuleLimitException(Exception):
+    msg: str = "The rule exceeds the limits of the Hue Bridge (8 conditions, 8 actions, a name of 32 characters)."
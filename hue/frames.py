@@ -0,0 +1,84 @@
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+
+def pandas():
+    """
+    Import pandas on first use, it is an optional dependency (pip install hue-sdk-py[pandas])
+    """
+    try:
+        import pandas
+    except ImportError as e:
+        raise ImportError("DataFrames need pandas: pip install hue-sdk-py[pandas]") from e
+    return pandas
+
+
+SCHEMAS: Dict[str, Tuple[str, ...]] = {
+    "lights": (
+        "id", "name", "type", "modelid", "manufacturername", "productname", "uniqueid", "swversion",
+        "state.on", "state.bri", "state.hue", "state.sat", "state.effect", "state.xy", "state.ct",
+        "state.alert", "state.colormode", "state.mode", "state.reachable",
+        "capabilities.control.colorgamuttype",
+    ),
+    "groups": (
+        "id", "name", "type", "class", "lights", "sensors", "recycle",
+        "state.all_on", "state.any_on",
+        "action.on", "action.bri", "action.hue", "action.sat", "action.effect", "action.xy",
+        "action.ct", "action.alert", "action.colormode",
+    ),
+    "sensors": (
+        "id", "name", "type", "modelid", "manufacturername", "productname", "uniqueid", "swversion",
+        "state.lastupdated", "state.presence", "state.temperature", "state.lightlevel", "state.dark",
+        "state.daylight", "state.buttonevent", "state.status",
+        "config.on", "config.reachable", "config.battery",
+    ),
+}
+
+
+def getter(column: str) -> Callable[[dict], Any]:
+    """
+    :param column: Dotted path such as "state.bri"
+    :return: A function reading the value from a resource dict, None if it is missing
+    """
+    keys: Tuple[str, ...] = tuple(column.split("."))
+    if len(keys) == 1:
+        return lambda item: item.get(keys[0])
+    
+    def get(item: dict) -> Any:
+        for key in keys:
+            if type(item) is not dict:
+                return None
+            item = item.get(key)
+        return item
+    
+    return get
+
+
+def flatten(res: Union[dict, list], columns: Tuple[str, ...]) -> Dict[str, list]:
+    """
+    Build column lists for the given schema without touching the input.
+    :param res: {id: resource} as returned by All.lights(), or a list of resources
+    """
+    if type(res) is dict:
+        ids: List[Optional[str]] = list(res.keys())
+        items: list = list(res.values())
+    else:
+        ids, items = [None] * len(res), list(res)
+    table: Dict[str, list] = {}
+    for column in columns:
+        if column == "id":
+            table[column] = [i if i is not None else item.get("id") for i, item in zip(ids, items)]
+            continue
+        get = getter(column)
+        table[column] = [get(item) for item in items]
+    return table
+
+
+def to_dataframe(res: Union[dict, list], resource: str) -> "DataFrame":
+    """
+    :param resource: "lights", "groups" or "sensors"
+    """
+    columns: Tuple[str, ...] = SCHEMAS[resource]
+    return pandas().DataFrame(flatten(res, columns), columns=list(columns))
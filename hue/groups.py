@@ -1,6 +1,7 @@
-from typing import Union, List
+from typing import Optional, Union, List
 
-from .util import range_check, _id_check, rgb2xy, hex2dec
+from .util import range_check, _id_check, rgb2xy, hex2xy
+from .batch import StateBatch
 from .exceptions import (
     BrightnessRangeException,
     HueRangeException,
@@ -53,6 +54,9 @@ class Groups:
                             method="PUT",
                             payload=payload)
     
+    def batch(self, group_id: Union[int, str]) -> StateBatch:
+        return StateBatch(self.action, group_id)
+    
     def on(self, group_id: Union[int, str]) -> Union[list, dict]:
         return self.action(group_id, payload={"on": True})
     
@@ -87,13 +91,15 @@ class Groups:
             },
         )
     
-    def rgb(self, group_id: Union[int, str], r: int, g: int, b: int, transitiontime: int = 5) -> Union[list, dict]:
-        x, y = rgb2xy(r, g, b)
+    def rgb(self, group_id: Union[int, str], r: int, g: int, b: int,
+            transitiontime: int = 5, gamut: Optional[str] = None) -> Union[list, dict]:
+        x, y = rgb2xy(r, g, b, gamut=gamut)
         return self.xy(group_id, x, y, transitiontime=transitiontime)
     
-    def rgbhex(self, group_id: Union[int, str], color_code: str, transitiontime: int = 5) -> Union[list, dict]:
-        rgb: dict = hex2dec(color_code)
-        return self.rgb(group_id, **rgb, transitiontime=transitiontime)
+    def rgbhex(self, group_id: Union[int, str], color_code: str,
+               transitiontime: int = 5, gamut: Optional[str] = None) -> Union[list, dict]:
+        x, y = hex2xy(color_code, gamut=gamut)
+        return self.xy(group_id, x, y, transitiontime=transitiontime)
     
     def scene(self, group_id: Union[int, str], scene: str) -> Union[list, dict]:
         return self.action(group_id, payload={"scene": scene})
@@ -1,39 +1,136 @@
-import logging
-from typing import Optional, Union
+import time
+from functools import partial
+from typing import TYPE_CHECKING, Dict, List, Optional, Union, Tuple
 
 import requests
-from pandas import DataFrame
-from pandas.io.json import json_normalize
+from requests.adapters import HTTPAdapter
 
 from . import util
 from .all import All
 from .lights import Lights
 from .groups import Groups
-from .exceptions import (
-    NoConnectionSettingsException,
-)
+from .scenes import Scenes
+from .schedules import Schedules
+from .sensors import Sensors
+from .rules import Rules
+from .scheduler import CommandScheduler
+from .metrics import Metrics
+from .cache import StateCache
+from .events import EventStream
+from .poller import SensorPoller
+from .planner import apply_states
+from .reconcile import reconcile
+from .snapshot import Snapshot
+from .automation import Rule, sync_rules
+from .resilience import Resilience
+from . import frames
 
-logging.basicConfig(filename="hue.log", level=logging.DEBUG)
-logger = logging.getLogger("hue")
+if TYPE_CHECKING:
+    from pandas import DataFrame
+    from .animation import Player, Timeline
 
 
 class Hue:
     
-    def __init__(self):
-        yc = util.YamlConfig()
-        if not yc.exists():
-            raise NoConnectionSettingsException
-        
-        # Values
-        settings: dict = yc.load()["Auth"]
-        ip: str = settings["ip"]
+    def __init__(self, pool_size: int = util.DEFAULT_POOL_SIZE,
+                 timeout: Tuple[float, float] = util.DEFAULT_TIMEOUT,
+                 scheduler: Optional[CommandScheduler] = None,
+                 metrics: Optional[Metrics] = None,
+                 cache: Optional[StateCache] = None,
+                 resilience: Optional[Resilience] = None,
+                 ip: Optional[str] = None, user_name: Optional[str] = None):
+        # Values (config.yml is used unless both ip and user_name are given)
+        settings: dict = {"ip": ip, "user_name": user_name} if ip and user_name else util.load_auth()
+        self.ip: str = settings["ip"]
         self.user_name: str = settings["user_name"]
-        self.base: str = f"http://{ip}/api/{{user_name}}"
+        self.base: str = f"http://{self.ip}/api/{{user_name}}"
+        self.timeout: Tuple[float, float] = timeout
+        
+        # Connection pool (keep-alive connections to the bridge are reused between requests)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # Opt-in pacing of light state / group action commands
+        self.scheduler: Optional[CommandScheduler] = scheduler
+        
+        # Opt-in instrumentation, nothing is measured when it is None
+        self.metrics: Optional[Metrics] = metrics
+        
+        # Opt-in state mirror serving reads from memory
+        self.cache: Optional[StateCache] = cache
+        
+        # Opt-in retries, circuit breaker and hedged reads
+        self.resilience: Optional[Resilience] = resilience
         
         # API
         self.all = All(self)
         self.lights = Lights(self)
         self.groups = Groups(self)
+        self.scenes = Scenes(self)
+        self.schedules = Schedules(self)
+        self.sensors = Sensors(self)
+        self.rules = Rules(self)
+    
+    def __enter__(self) -> "Hue":
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        if self.scheduler is not None:
+            self.scheduler.close()
+        if self.resilience is not None:
+            self.resilience.close()
+        self.session.close()
+    
+    def events(self, **kwargs) -> EventStream:
+        """
+        :return: A subscriber for the CLIP v2 event stream of this bridge (call start() or iterate it)
+        """
+        return EventStream(ip=self.ip, user_name=self.user_name, **kwargs)
+    
+    def sensor_poller(self, **kwargs) -> SensorPoller:
+        """
+        :return: A poller emitting only the sensors that changed (call start() or poll_once())
+        """
+        return SensorPoller(self, **kwargs)
+    
+    def apply_states(self, states: Dict[Union[int, str], dict], **kwargs) -> List[Union[list, dict]]:
+        """
+        Set many lights at once, collapsing identical states into group actions or a temporary scene.
+        :param states: {light_id: state payload}
+        """
+        return apply_states(self, states, **kwargs)
+    
+    def sync_rules(self, rules: List[Rule], **kwargs) -> list:
+        """
+        Compile the rules and create, update or delete bridge rules so that they match.
+        :param kwargs: prune, dry_run, workers
+        """
+        return sync_rules(self, rules, **kwargs)
+    
+    def snapshot(self, lights: Optional[List[Union[int, str]]] = None, **kwargs) -> Snapshot:
+        """
+        :return: The current states of the lights stored as a bridge scene (call restore())
+        """
+        return Snapshot(self, lights, **kwargs).take()
+    
+    def reconcile(self, spec: Union[str, dict], **kwargs) -> list:
+        """
+        Bring groups, scenes and schedules to the state described by spec (a dict or a YAML path).
+        :param kwargs: dry_run, prune, workers
+        """
+        return reconcile(self, spec, **kwargs)
+    
+    def animate(self, timeline: "Timeline", **kwargs) -> "Player":
+        """
+        :return: A player sending the timeline through the light command budget (call play())
+        """
+        from .animation import Player
+        return Player(self, timeline, **kwargs)
     
     def request(self, path: str = "", method: str = "GET",
                 user_name: Optional[str] = None,
@@ -42,24 +139,68 @@ class Hue:
         base = self.base.format(user_name=user_name)
         endpoint: str = f"{base}/{path}"
         
-        res = requests.request(method=method, url=endpoint, json=payload).json()
-        
-        # Log
-        logger.debug("=-" * 32)
-        logger.debug(f"{method}: {endpoint}")
-        logger.debug(res)
+        if self.cache is None or user_name != self.user_name:
+            return self._dispatch(method, path, endpoint, payload)
+        if method == "GET":
+            if (cached := self.cache.get(path)) is not None:
+                return cached
+            res = self._dispatch(method, path, endpoint, payload)
+            self.cache.put(path, res)
+            return res
+        res = self._dispatch(method, path, endpoint, payload)
+        self.cache.apply(path, method, res)
         return res
     
+    def _dispatch(self, method: str, path: str, endpoint: str, payload: Optional[dict] = None) -> Union[list, dict]:
+        if self.scheduler is not None and method == "PUT":
+            if bucket := self.scheduler.bucket_for(path):
+                send = partial(self._send, method, path, endpoint)
+                return self.scheduler.submit(endpoint, bucket, payload, send).result()
+        return self._send(method, path, endpoint, payload)
+    
+    def _send(self, method: str, path: str, endpoint: str, payload: Optional[dict] = None) -> Union[list, dict]:
+        if self.resilience is None:
+            return self._attempt(method, path, endpoint, payload)[1]
+        return self.resilience.call(method, partial(self._attempt, method, path, endpoint, payload), payload)
+    
+    def _attempt(self, method: str, path: str, endpoint: str,
+                 payload: Optional[dict] = None) -> Tuple[int, Union[list, dict]]:
+        """
+        :return: (HTTP status, JSON body)
+        """
+        if self.metrics is None:
+            res = self.session.request(method=method, url=endpoint, json=payload, timeout=self.timeout)
+            return res.status_code, util.json_loads(res.content)
+        
+        start: float = time.perf_counter()
+        try:
+            res = self.session.request(method=method, url=endpoint, json=payload, timeout=self.timeout)
+            body = util.json_loads(res.content)
+        except Exception as e:
+            self.metrics.record(method, path, 0, time.perf_counter() - start, exception=type(e).__name__)
+            raise
+        self.metrics.record(
+            method, path, res.status_code, time.perf_counter() - start,
+            bytes_sent=len(res.request.body or b""),
+            bytes_received=len(res.content),
+            res=body,
+        )
+        return res.status_code, body
+    
     @staticmethod
-    def to_dataframe(res: Union[dict, list], id_exists=False) -> DataFrame:
+    def to_dataframe(res: Union[dict, list], id_exists=False, resource: Optional[str] = None) -> "DataFrame":
+        """
+        :param resource: "lights", "groups" or "sensors" to use the fixed schema of hue.frames,
+                         which is much faster than json_normalize
+        """
+        if resource is not None:
+            return frames.to_dataframe(res, resource)
+        json_normalize = frames.pandas().json_normalize
         if type(res) is dict and id_exists:
-            table = []
-            for key, value in res.items():
-                value["id"] = key
-                table.append(value)
+            table = [{"id": key, **value} for key, value in res.items()]
             df = json_normalize(table, max_level=5)
             columns = [col for col in df.columns.tolist() if col != "id"]
-            return df[["id"] + columns[:-1]]
+            return df[["id"] + columns]
         elif type(res) is list:
             return json_normalize(res, max_level=5)
         return json_normalize(list(res.values()), max_level=5)
@@ -1,6 +1,7 @@
-from typing import Union
+from typing import Dict, Optional, Union
 
-from .util import range_check, _id_check, rgb2xy, hex2dec
+from .util import range_check, _id_check, rgb2xy, hex2xy
+from .batch import StateBatch
 from .exceptions import (
     BrightnessRangeException,
     HueRangeException,
@@ -13,6 +14,8 @@ class Lights:
     def __init__(self, parent):
         self.base: str = parent.base
         self.request = parent.request
+        # Color gamut of each light, resolved once from modelid/capabilities
+        self.gamuts: Dict[str, Optional[str]] = {}
     
     def get_new_lights(self) -> Union[list, dict]:
         return self.request(path="lights/new")
@@ -34,6 +37,9 @@ class Lights:
                             method="PUT",
                             payload=payload)
     
+    def batch(self, light_id: Union[int, str]) -> StateBatch:
+        return StateBatch(self.action, light_id, gamut=lambda: self.gamut(light_id))
+    
     def on(self, light_id: Union[int, str], transitiontime: int = 5) -> Union[list, dict]:
         return self.action(light_id, payload={"on": True, "transitiontime": transitiontime})
     
@@ -48,6 +54,25 @@ class Lights:
             return self.on(light_id, transitiontime)
         raise GettingLightAttributeException
     
+    def gamut(self, light_id: Union[int, str]) -> Optional[str]:
+        """
+        :return: The color gamut ("A", "B" or "C") of the light, or None if it is unknown.
+                 The attributes are read only the first time for each light.
+        """
+        if (key := str(light_id)) not in self.gamuts:
+            self.load_gamuts({key: self.get_attributes(light_id)})
+        return self.gamuts.get(key)
+    
+    def load_gamuts(self, lights: dict) -> Dict[str, Optional[str]]:
+        """
+        Cache the color gamuts of many lights at once, error responses are not cached.
+        :param lights: Response of All.lights
+        """
+        from .color import gamut_for_light
+        self.gamuts.update({str(light_id): gamut_for_light(attributes)
+                            for light_id, attributes in lights.items() if type(attributes) is dict})
+        return self.gamuts
+    
     @range_check(name="bri", start=1, end=254, exception=BrightnessRangeException)
     def brightness(self, light_id: Union[int, str], val: int) -> Union[list, dict]:
         return self.action(light_id, payload={"bri": val})
@@ -76,13 +101,15 @@ class Lights:
             },
         )
     
-    def rgb(self, light_id: Union[int, str], r: int, g: int, b: int, transitiontime: int = 5) -> Union[list, dict]:
-        x, y = rgb2xy(r, g, b)
+    def rgb(self, light_id: Union[int, str], r: int, g: int, b: int,
+            transitiontime: int = 5, gamut: Optional[str] = None) -> Union[list, dict]:
+        x, y = rgb2xy(r, g, b, gamut=gamut or self.gamut(light_id))
         return self.xy(light_id, x, y, transitiontime=transitiontime)
     
-    def rgbhex(self, light_id: Union[int, str], color_code: str, transitiontime: int = 5) -> Union[list, dict]:
-        rgb: dict = hex2dec(color_code)
-        return self.rgb(light_id, **rgb, transitiontime=transitiontime)
+    def rgbhex(self, light_id: Union[int, str], color_code: str,
+               transitiontime: int = 5, gamut: Optional[str] = None) -> Union[list, dict]:
+        x, y = hex2xy(color_code, gamut=gamut or self.gamut(light_id))
+        return self.xy(light_id, x, y, transitiontime=transitiontime)
     
     def delete(self, light_id: Union[int, str]) -> Union[list, dict]:
         return self.request(path=f"lights/{light_id}", method="DELETE")
@@ -0,0 +1,151 @@
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RESOURCES: frozenset = frozenset((
+    "lights", "groups", "scenes", "schedules", "sensors", "rules", "resourcelinks",
+))
+
+
+class RequestEvent(NamedTuple):
+    method: str
+    endpoint: str
+    status: int
+    latency: float
+    bytes_sent: int
+    bytes_received: int
+    error_types: Tuple[int, ...]
+    exception: Optional[str] = None
+
+
+def endpoint_template(path: str) -> str:
+    """
+    Replace resource IDs so that all lights/groups share one series.
+    e.g. lights/3/state -> lights/{id}/state
+    """
+    parts: List[str] = path.strip("/").split("/")
+    for n in range(1, len(parts)):
+        if parts[n - 1] in RESOURCES and parts[n] != "new":
+            parts[n] = "{id}"
+    return "/".join(parts)
+
+
+def error_types(res: Union[list, dict]) -> Tuple[int, ...]:
+    """
+    :return: The `type` of each [{"error": {...}}] entry of a bridge response
+    """
+    if type(res) is not list:
+        return ()
+    return tuple(item["error"].get("type", 0) for item in res if type(item) is dict and "error" in item)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+    
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets: Tuple[float, ...] = buckets
+        self.counts: List[int] = [0] * len(buckets)
+        self.total: float = 0.0
+        self.count: int = 0
+    
+    def observe(self, value: float) -> None:
+        self.total += value
+        self.count += 1
+        for n, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[n] += 1
+                break
+
+
+class Metrics:
+    """
+    Collects per-endpoint latency histograms, request/byte counters and bridge error codes.
+    Pass an instance to Hue(metrics=...) to enable it; nothing is measured otherwise.
+    """
+    
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets: Tuple[float, ...] = buckets
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.requests: Counter = Counter()
+        self.bytes_sent: Counter = Counter()
+        self.bytes_received: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.exceptions: Counter = Counter()
+        self.hooks: List[Callable[[RequestEvent], None]] = []
+        self._lock = threading.Lock()
+    
+    def add_hook(self, hook: Callable[[RequestEvent], None]) -> None:
+        """
+        :param hook: Called with a RequestEvent after every request
+        """
+        self.hooks.append(hook)
+    
+    def record(self, method: str, path: str, status: int, latency: float,
+               bytes_sent: int = 0, bytes_received: int = 0,
+               res: Union[list, dict, None] = None, exception: Optional[str] = None) -> None:
+        event = RequestEvent(
+            method=method,
+            endpoint=endpoint_template(path),
+            status=status,
+            latency=latency,
+            bytes_sent=bytes_sent,
+            bytes_received=bytes_received,
+            error_types=error_types(res) if res is not None else (),
+            exception=exception,
+        )
+        self.observe(event)
+    
+    def observe(self, event: RequestEvent) -> None:
+        key: Tuple[str, str] = (event.method, event.endpoint)
+        with self._lock:
+            if (hist := self.latency.get(key)) is None:
+                hist = self.latency[key] = Histogram(self.buckets)
+            hist.observe(event.latency)
+            self.requests[key + (event.status,)] += 1
+            self.bytes_sent[key] += event.bytes_sent
+            self.bytes_received[key] += event.bytes_received
+            for error_type in event.error_types:
+                self.errors[key + (error_type,)] += 1
+            if event.exception:
+                self.exceptions[key + (event.exception,)] += 1
+        for hook in self.hooks:
+            hook(event)
+    
+    def reset(self) -> None:
+        with self._lock:
+            self.latency.clear()
+            for counter in (self.requests, self.bytes_sent, self.bytes_received, self.errors, self.exceptions):
+                counter.clear()
+    
+    def render_prometheus(self, prefix: str = "hue") -> str:
+        """
+        :return: The metrics in the Prometheus text exposition format
+        """
+        lines: List[str] = []
+        with self._lock:
+            lines.append(f"# TYPE {prefix}_request_duration_seconds histogram")
+            for (method, endpoint), hist in sorted(self.latency.items()):
+                labels: str = f'method="{method}",endpoint="{endpoint}"'
+                cumulative: int = 0
+                for bound, count in zip(hist.buckets, hist.counts):
+                    cumulative += count
+                    lines.append(f'{prefix}_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}_request_duration_seconds_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f"{prefix}_request_duration_seconds_sum{{{labels}}} {hist.total}")
+                lines.append(f"{prefix}_request_duration_seconds_count{{{labels}}} {hist.count}")
+            self._render_counter(lines, f"{prefix}_requests_total", self.requests, "status")
+            self._render_counter(lines, f"{prefix}_request_bytes_total", self.bytes_sent)
+            self._render_counter(lines, f"{prefix}_response_bytes_total", self.bytes_received)
+            self._render_counter(lines, f"{prefix}_bridge_errors_total", self.errors, "type")
+            self._render_counter(lines, f"{prefix}_request_exceptions_total", self.exceptions, "exception")
+        return "\n".join(lines) + "\n"
+    
+    @staticmethod
+    def _render_counter(lines: List[str], name: str, counter: Counter, extra: Optional[str] = None) -> None:
+        lines.append(f"# TYPE {name} counter")
+        for key, value in sorted(counter.items(), key=lambda item: tuple(map(str, item[0]))):
+            labels: str = f'method="{key[0]}",endpoint="{key[1]}"'
+            if extra is not None:
+                labels += f',{extra}="{key[2]}"'
+            lines.append(f"{name}{{{labels}}} {value}")
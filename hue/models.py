@@ -0,0 +1,152 @@
+import sys
+from typing import Dict, Optional, Tuple, Type, Union
+
+
+class Model:
+    """
+    Compact view of a bridge resource.
+    Known scalar fields are copied into slots (strings are interned, so repeated values such
+    as model IDs are stored once), nested objects listed in NESTED are parsed into their own
+    model on first access, and any other key is kept in `extra`.
+    """
+    __slots__ = ("extra", "_pending")
+    FIELDS: Tuple[Tuple[str, str], ...] = ()  # (attribute, JSON key)
+    NESTED: Dict[str, Type["Model"]] = {}
+    
+    def __init__(self, raw: dict):
+        known: set = set(self.NESTED)
+        for attr, key in self.FIELDS:
+            value = raw.get(key)
+            setattr(self, attr, sys.intern(value) if type(value) is str else value)
+            known.add(key)
+        pending: dict = {name: raw[name] for name in self.NESTED if name in raw}
+        self._pending: Optional[dict] = pending if pending else None
+        extra: dict = {key: value for key, value in raw.items() if key not in known}
+        self.extra: Optional[dict] = extra if extra else None
+    
+    def __getattr__(self, name: str):
+        # Only called for slots that are not set yet, i.e. nested objects not parsed so far
+        cls: Optional[Type[Model]] = self.NESTED.get(name)
+        if cls is None:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        pending: Optional[dict] = self._pending
+        raw = pending.pop(name, None) if pending else None
+        value = cls(raw) if type(raw) is dict else raw
+        setattr(self, name, value)
+        if not pending:
+            self._pending = None
+        return value
+    
+    def materialize(self) -> "Model":
+        """
+        Parse every nested object now so that the raw dicts can be freed.
+        """
+        for name in self.NESTED:
+            getattr(self, name)
+        return self
+    
+    def to_dict(self) -> dict:
+        res: dict = {key: getattr(self, attr) for attr, key in self.FIELDS if getattr(self, attr) is not None}
+        for name in self.NESTED:
+            if (value := getattr(self, name)) is not None:
+                res[name] = value.to_dict()
+        if self.extra:
+            res.update(self.extra)
+        return res
+    
+    def __repr__(self) -> str:
+        fields: str = ", ".join(f"{attr}={getattr(self, attr)!r}" for attr, _ in self.FIELDS[:3])
+        return f"{type(self).__name__}({fields})"
+
+
+def _fields(*keys: str) -> Tuple[Tuple[str, str], ...]:
+    return tuple((f"{key}_" if key == "class" else key, key) for key in keys)
+
+
+def _slots(fields: Tuple[Tuple[str, str], ...], nested: Dict[str, Type[Model]]) -> Tuple[str, ...]:
+    return tuple(attr for attr, _ in fields) + tuple(nested)
+
+
+class LightState(Model):
+    FIELDS = _fields("on", "bri", "hue", "sat", "effect", "xy", "ct", "alert", "colormode", "mode", "reachable")
+    __slots__ = _slots(FIELDS, {})
+
+
+class GroupState(Model):
+    FIELDS = _fields("all_on", "any_on")
+    __slots__ = _slots(FIELDS, {})
+
+
+class SensorState(Model):
+    FIELDS = _fields("lastupdated", "presence", "temperature", "lightlevel", "dark", "daylight",
+                     "buttonevent", "status", "flag")
+    __slots__ = _slots(FIELDS, {})
+
+
+class SensorConfig(Model):
+    FIELDS = _fields("on", "reachable", "battery")
+    __slots__ = _slots(FIELDS, {})
+
+
+class Resource(Model):
+    __slots__ = ("id",)
+    
+    def __init__(self, raw: dict, id_: Optional[str] = None):
+        super().__init__(raw)
+        self.id: Optional[str] = id_
+
+
+class Light(Resource):
+    FIELDS = _fields("name", "type", "modelid", "manufacturername", "productname", "uniqueid", "swversion")
+    NESTED = {"state": LightState}
+    __slots__ = _slots(FIELDS, NESTED)
+
+
+class Group(Resource):
+    FIELDS = _fields("name", "type", "class", "lights", "sensors", "recycle")
+    NESTED = {"state": GroupState, "action": LightState}
+    __slots__ = _slots(FIELDS, NESTED)
+
+
+class Sensor(Resource):
+    FIELDS = _fields("name", "type", "modelid", "manufacturername", "productname", "uniqueid", "swversion")
+    NESTED = {"state": SensorState, "config": SensorConfig}
+    __slots__ = _slots(FIELDS, NESTED)
+
+
+class Schedule(Resource):
+    FIELDS = _fields("name", "description", "command", "localtime", "time", "created", "status",
+                     "autodelete", "recycle")
+    __slots__ = _slots(FIELDS, {})
+
+
+MODELS: Dict[str, Type[Resource]] = {
+    "lights": Light,
+    "groups": Group,
+    "sensors": Sensor,
+    "schedules": Schedule,
+}
+
+
+def parse(resource: str, res: Union[list, dict], eager: bool = False) -> Dict[str, Resource]:
+    """
+    :param resource: "lights", "groups", "sensors" or "schedules"
+    :param res: {id: resource} as returned by the All getters
+    :param eager: Parse nested objects now; smallest footprint for long-lived snapshots
+    :return: {id: model}
+    """
+    if type(res) is not dict:
+        return {}
+    cls: Type[Resource] = MODELS[resource]
+    if eager:
+        return {id_: cls(raw, id_).materialize() for id_, raw in res.items()}
+    return {id_: cls(raw, id_) for id_, raw in res.items()}
+
+
+def parse_one(resource: str, res: Union[list, dict], id_: Optional[str] = None) -> Optional[Resource]:
+    """
+    :param res: Response of get_attributes
+    """
+    if type(res) is not dict:
+        return None
+    return MODELS[resource](res, id_)
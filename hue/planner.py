@@ -0,0 +1,153 @@
+import json
+import math
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+from . import util
+
+TEMP_NAME: str = "hue-sdk-py apply"
+SCENE_KEYS: frozenset = frozenset(("on", "bri", "hue", "sat", "xy", "ct", "effect", "transitiontime"))
+# Seconds of rate budget a command uses: lights and groups are limited separately (about 10/s vs 1/s)
+LIGHT_COST: float = 1 / util.LIGHT_COMMANDS_PER_SEC
+GROUP_COST: float = 1 / util.GROUP_COMMANDS_PER_SEC
+# A temporary group or scene also creates and deletes it, counted like light commands
+TEMP_COST: float = GROUP_COST + 2 * LIGHT_COST
+
+
+class Step(NamedTuple):
+    """
+    kind: "group" (action on an existing group), "light" (action on one light),
+          "temp_group" (create, action, delete) or "temp_scene" (create with lightstates, recall, delete)
+    """
+    kind: str
+    target: Optional[str]
+    payload: dict
+    lights: Tuple[str, ...]
+    
+    @property
+    def requests(self) -> int:
+        return 3 if self.kind.startswith("temp_") else 1
+    
+    @property
+    def cost(self) -> float:
+        """
+        Seconds of rate budget the step uses
+        """
+        if self.kind == "light":
+            return LIGHT_COST
+        return GROUP_COST if self.kind == "group" else TEMP_COST
+
+
+def _freeze(state: dict) -> str:
+    return json.dumps(state, sort_keys=True)
+
+
+def _cover(remaining: Set[str], groups: Dict[str, Set[str]]) -> List[Tuple[str, Set[str]]]:
+    """
+    Greedily pick the largest existing groups made only of lights in `remaining`,
+    skipping the ones whose group command costs more than commanding their lights one by one.
+    """
+    picked: List[Tuple[str, Set[str]]] = []
+    candidates = sorted(groups.items(), key=lambda item: len(item[1]), reverse=True)
+    for group_id, members in candidates:
+        if len(members) > 1 and GROUP_COST <= len(members) * LIGHT_COST and members <= remaining:
+            picked.append((group_id, members))
+            remaining -= members
+    return picked
+
+
+def plan_states(states: Dict[Union[int, str], dict], groups: Dict[str, dict],
+                all_lights: Optional[Iterable[str]] = None,
+                use_scenes: bool = True, use_temp_groups: bool = True,
+                min_temp_lights: Optional[int] = None) -> List[Step]:
+    """
+    Plan the steps setting each light to its target state with the least rate budget (see Step.cost).
+    :param states: {light_id: state payload}
+    :param groups: Response of All.groups()
+    :param all_lights: IDs of every light on the bridge, allows group 0 when they all share a state
+    :param min_temp_lights: Lights left over before a temporary scene or group (3 requests) is used,
+                            by default when it costs less than the light commands it replaces
+    """
+    if min_temp_lights is None:
+        min_temp_lights = math.ceil(round(TEMP_COST / LIGHT_COST, 9))
+    buckets: Dict[str, Set[str]] = {}
+    payloads: Dict[str, dict] = {}
+    for light_id, state in states.items():
+        key: str = _freeze(state)
+        buckets.setdefault(key, set()).add(str(light_id))
+        payloads[key] = state
+    group_sets: Dict[str, Set[str]] = {
+        group_id: set(group.get("lights", [])) for group_id, group in groups.items()
+    }
+    if all_lights is not None:
+        group_sets["0"] = set(map(str, all_lights))
+    
+    steps: List[Step] = []
+    leftovers: Dict[str, Set[str]] = {}
+    for key, lights in sorted(buckets.items(), key=lambda item: len(item[1]), reverse=True):
+        remaining: Set[str] = set(lights)
+        for group_id, members in _cover(remaining, group_sets):
+            steps.append(Step("group", group_id, payloads[key], tuple(sorted(members))))
+        if remaining:
+            leftovers[key] = remaining
+    
+    count: int = sum(len(lights) for lights in leftovers.values())
+    scene_ready: bool = all(set(payloads[key]) <= SCENE_KEYS for key in leftovers)
+    if use_scenes and scene_ready and count >= min_temp_lights:
+        lightstates: dict = {light_id: payloads[key] for key, lights in leftovers.items() for light_id in lights}
+        steps.append(Step("temp_scene", None, lightstates, tuple(sorted(lightstates))))
+        return steps
+    for key, lights in leftovers.items():
+        if use_temp_groups and len(lights) >= min_temp_lights:
+            steps.append(Step("temp_group", None, payloads[key], tuple(sorted(lights))))
+            continue
+        steps.extend(Step("light", light_id, payloads[key], (light_id,)) for light_id in sorted(lights))
+    return steps
+
+
+def _created_id(res: Union[list, dict]) -> Optional[str]:
+    if type(res) is list and res and type(res[0]) is dict:
+        return res[0].get("success", {}).get("id")
+    return None
+
+
+def execute(hue, steps: List[Step]) -> List[Union[list, dict]]:
+    """
+    :return: The response of each step's action, a temporary group or scene that cannot be created
+             is followed by the responses of the light commands replacing it
+    """
+    results: List[Union[list, dict]] = []
+    for step in steps:
+        if step.kind == "group":
+            results.append(hue.groups.action(step.target, payload=step.payload))
+        elif step.kind == "light":
+            results.append(hue.lights.action(step.target, payload=step.payload))
+        elif step.kind == "temp_group":
+            res = hue.groups.create(list(step.lights), TEMP_NAME)
+            if (group_id := _created_id(res)) is None:
+                # e.g. the group table is full, command the lights one by one
+                results.append(res)
+                results += [hue.lights.action(light_id, payload=step.payload) for light_id in step.lights]
+                continue
+            results.append(hue.groups.action(group_id, payload=step.payload))
+            hue.groups.delete(group_id)
+        elif step.kind == "temp_scene":
+            res = hue.scenes.create(TEMP_NAME, True, "LightScene", lights=list(step.lights),
+                                    params={"lightstates": step.payload})
+            if (scene_id := _created_id(res)) is None:
+                results.append(res)
+                results += [hue.lights.action(light_id, payload=state) for light_id, state in step.payload.items()]
+                continue
+            results.append(hue.groups.scene(0, scene_id))
+            hue.scenes.delete(scene_id)
+    return results
+
+
+def apply_states(hue, states: Dict[Union[int, str], dict], **kwargs) -> List[Union[list, dict]]:
+    """
+    Set many lights to their target states using as little of the rate budget as possible.
+    e.g. apply_states(hue, {1: {"on": True, "bri": 200}, 2: {"on": True, "bri": 200}, 3: {"on": False}})
+    :param kwargs: Passed to plan_states
+    """
+    lights = hue.all.lights()
+    steps: List[Step] = plan_states(states, hue.all.groups(), all_lights=list(lights), **kwargs)
+    return execute(hue, steps)
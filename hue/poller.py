@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from . import util
+from .metrics import error_types
+from .scheduler import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+def change_key(sensor: dict) -> object:
+    """
+    :return: state.lastupdated, or the whole state for sensors that never set it
+    """
+    state: dict = sensor.get("state", {})
+    lastupdated = state.get("lastupdated")
+    if lastupdated in (None, "none"):
+        return tuple(sorted((k, repr(v)) for k, v in state.items()))
+    return lastupdated
+
+
+class SensorPoller:
+    """
+    Polls sensors and emits only the ones whose state changed.
+    Each sensor has its own interval: it is halved when the sensor changed and grows
+    when it did not, within [min_interval, max_interval]. Due sensors are read one by
+    one while that is cheaper than reading all of them, and all reads share a global
+    request budget (requests per second). A sensor that is gone from the bridge is dropped,
+    one whose read fails is retried after its interval.
+    """
+    
+    def __init__(self, hue, budget: float = util.POLL_BUDGET,
+                 min_interval: float = util.POLL_MIN_INTERVAL,
+                 max_interval: float = util.POLL_MAX_INTERVAL,
+                 bulk_threshold: int = 3,
+                 clock: Callable[[], float] = time.monotonic):
+        self.hue = hue
+        self.bucket = TokenBucket(budget, capacity=max(1.0, budget))
+        self.min_interval: float = min_interval
+        self.max_interval: float = max_interval
+        self.bulk_threshold: int = bulk_threshold
+        self.clock = clock
+        self.callbacks: List[Callable[[dict], None]] = []
+        self.intervals: Dict[str, float] = {}
+        self.due: Dict[str, float] = {}
+        self.keys: Dict[str, object] = {}
+        self.sensors: Dict[str, dict] = {}
+        self.requests: int = 0
+        self.last_error: Optional[Exception] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def subscribe(self, callback: Callable[[dict], None]) -> Callable[[dict], None]:
+        """
+        :param callback: Called with {"id": ..., "sensor": ..., "previous": ...} for each change
+        """
+        self.callbacks.append(callback)
+        return callback
+    
+    def poll_once(self) -> List[dict]:
+        """
+        Read the sensors that are due, as far as the budget allows.
+        :return: The change events that were emitted
+        """
+        now: float = self.clock()
+        due: List[str] = [sensor_id for sensor_id, t in self.due.items() if t <= now]
+        if self.sensors and not due:
+            return []
+        if not self.bucket.consume(now):
+            return []
+        self.requests += 1
+        if not self.sensors or len(due) >= self.bulk_threshold:
+            res = self.hue.all.sensors()
+            if type(res) is not dict:
+                self._defer(due, now)
+                return []
+            self._forget(sensor_id for sensor_id in list(self.sensors) if sensor_id not in res)
+            return self._update(res, now)
+        sensor_id: str = min(due, key=self.due.__getitem__)
+        res = self.hue.sensors.get_attributes(sensor_id)
+        if type(res) is dict and "state" in res:
+            return self._update({sensor_id: res}, now)
+        if 3 in error_types(res):
+            # Resource not available, the sensor was deleted
+            self._forget((sensor_id,))
+        else:
+            self._defer((sensor_id,), now)
+        return []
+    
+    def _forget(self, sensor_ids: Iterable[str]) -> None:
+        for sensor_id in sensor_ids:
+            for table in (self.due, self.intervals, self.keys, self.sensors):
+                table.pop(sensor_id, None)
+    
+    def _defer(self, sensor_ids: Iterable[str], now: float) -> None:
+        for sensor_id in sensor_ids:
+            self.due[sensor_id] = now + self.intervals.get(sensor_id, self.max_interval / 4)
+    
+    def _update(self, fetched: Dict[str, dict], now: float) -> List[dict]:
+        events: List[dict] = []
+        for sensor_id, sensor in fetched.items():
+            key = change_key(sensor)
+            previous: Optional[dict] = self.sensors.get(sensor_id)
+            interval: float = self.intervals.get(sensor_id, self.max_interval / 4)
+            if previous is not None and key != self.keys.get(sensor_id):
+                interval = max(self.min_interval, interval / 2)
+                events.append({"id": sensor_id, "sensor": sensor, "previous": previous})
+            elif previous is not None:
+                interval = min(self.max_interval, interval * 1.5)
+            self.keys[sensor_id] = key
+            self.sensors[sensor_id] = sensor
+            self.intervals[sensor_id] = interval
+            self.due[sensor_id] = now + interval
+        for event in events:
+            for callback in self.callbacks:
+                callback(event)
+        return events
+    
+    def next_wakeup(self) -> float:
+        """
+        :return: Seconds until the next sensor is due or the budget allows a request
+        """
+        now: float = self.clock()
+        due: float = min(self.due.values(), default=now) - now
+        return max(due, self.bucket.wait_time(now), 0.0)
+    
+    def start(self) -> "SensorPoller":
+        def loop() -> None:
+            while not self._stop.is_set():
+                try:
+                    self.poll_once()
+                except Exception as e:
+                    # e.g. a timeout, keep polling
+                    self.last_error = e
+                    logger.warning("Sensor poll failed: %r", e)
+                    now: float = self.clock()
+                    self._defer([sensor_id for sensor_id, t in self.due.items() if t <= now], now)
+                self._stop.wait(max(self.next_wakeup(), util.POLL_MIN_SLEEP))
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name="hue-poller", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,243 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from .util import YamlConfig, by_name, same, sorted_ids
+from .planner import _created_id
+
+REFERENCE_PATTERN = re.compile(r"\{(group|scene):([^}]+)\}")
+RESOURCES: Tuple[str, ...] = ("groups", "scenes", "schedules")
+
+
+class Change(NamedTuple):
+    """
+    resource: "groups", "scenes" or "schedules"
+    op: "create", "update" or "delete"
+    path: Sub-resource of an update, e.g. "lightstates/3"
+    """
+    resource: str
+    op: str
+    name: str
+    id: Optional[str]
+    payload: dict
+    path: str = ""
+
+
+def load_spec(spec: Union[str, dict]) -> dict:
+    """
+    :param spec: A dictionary or the path of a YAML file with `groups`, `scenes` and `schedules` keyed by name
+    """
+    if type(spec) is str:
+        spec = YamlConfig(spec).load() or {}
+    return {resource: dict(spec.get(resource) or {}) for resource in RESOURCES}
+
+
+def _diff(desired: dict, current: dict) -> dict:
+    return {key: value for key, value in desired.items() if not same(value, current.get(key))}
+
+
+class Reconciler:
+    """
+    Bring the groups, scenes and schedules of a bridge to a desired state with the fewest writes.
+    The current state is read once (full state), resources are matched by name so that their IDs
+    survive, and each phase (groups, scenes, lightstates, schedules, then deletes in reverse order)
+    is sent in parallel.
+
+    groups:
+      Living:
+        lights: [1, 2, 3]
+        type: Room
+        class: Living room
+    scenes:
+      Evening:
+        group: "{group:Living}"
+        lightstates:
+          1: {on: true, bri: 120}
+    schedules:
+      Wake up:
+        localtime: W124/T07:00:00
+        command: {address: "/groups/{group:Living}/action", method: PUT, body: {scene: "{scene:Evening}"}}
+
+    :param prune: Delete groups, scenes and schedules that are not in the spec
+    :param workers: Requests in flight within a phase
+    """
+    
+    def __init__(self, hue, spec: Union[str, dict], prune: bool = False, workers: int = 4):
+        self.hue = hue
+        self.spec: dict = load_spec(spec)
+        self.prune: bool = prune
+        self.workers: int = workers
+        self.current: Optional[dict] = None
+        self.ids: Dict[str, Dict[str, str]] = {"group": {}, "scene": {}}
+    
+    def fetch(self) -> dict:
+        state = self.hue.all.full_state()
+        self.current = {resource: state.get(resource, {}) for resource in RESOURCES}
+        for kind, resource in (("group", "groups"), ("scene", "scenes")):
+            self.ids[kind] = {name: id_ for name, (id_, _) in by_name(self.current[resource]).items()}
+        return self.current
+    
+    def resolve(self, value: Any) -> Any:
+        """
+        Replace {group:NAME} and {scene:NAME} with the IDs known so far.
+        """
+        if isinstance(value, dict):
+            return {key: self.resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.resolve(item) for item in value]
+        if isinstance(value, str):
+            return REFERENCE_PATTERN.sub(lambda m: self.ids[m.group(1)].get(m.group(2), m.group(0)), value)
+        return value
+    
+    # Desired state
+    def _group(self, name: str, spec: dict) -> dict:
+        desired: dict = {"name": name, **self.resolve(spec)}
+        desired["lights"] = sorted_ids(desired.get("lights", []))
+        return desired
+    
+    def _scene(self, name: str, spec: dict) -> dict:
+        desired: dict = {"name": name, **self.resolve(spec)}
+        if "lightstates" in desired:
+            desired["lightstates"] = {str(key): value for key, value in desired["lightstates"].items()}
+        if desired.get("group") is not None:
+            desired["group"] = str(desired["group"])
+        else:
+            desired["lights"] = sorted_ids(desired.get("lights") or desired.get("lightstates", {}))
+        return desired
+    
+    def _schedule(self, name: str, spec: dict) -> dict:
+        desired: dict = {"name": name, **self.resolve(spec)}
+        address: str = desired.get("command", {}).get("address", "")
+        if address.startswith("/") and not address.startswith("/api/"):
+            desired["command"] = {**desired["command"], "address": f"/api/{self.hue.user_name}{address}"}
+        return desired
+    
+    # Planning
+    def plan_groups(self) -> List[Change]:
+        return self._plan("groups", self._group, immutable=("type",))
+    
+    def plan_scenes(self) -> List[Change]:
+        # recycle cannot be modified, a different value in the spec recreates the scene
+        return self._plan("scenes", self._scene, immutable=("type", "group", "recycle"), nested="lightstates")
+    
+    def plan_schedules(self) -> List[Change]:
+        return self._plan("schedules", self._schedule)
+    
+    def plan_deletes(self, resource: str) -> List[Change]:
+        if not self.prune:
+            return []
+        wanted = set(self.spec[resource])
+        kept = {id_ for name, (id_, _) in by_name(self.current[resource]).items() if name in wanted}
+        return [Change(resource, "delete", item.get("name", ""), id_, {})
+                for id_, item in self.current[resource].items() if id_ not in kept]
+    
+    def _plan(self, resource: str, build, immutable: Tuple[str, ...] = (), nested: Optional[str] = None) -> List[Change]:
+        current: Dict[str, Tuple[str, dict]] = by_name(self.current[resource])
+        details: Dict[str, dict] = self._details(resource, current, nested)
+        changes: List[Change] = []
+        for name, spec in self.spec[resource].items():
+            desired: dict = build(name, spec)
+            # Immutable keys are only compared when the spec sets them, defaults are applied on create
+            unchanged: bool = name in current and all(
+                same(desired[key], current[name][1].get(key)) for key in immutable if key in desired
+            )
+            if not unchanged:
+                if name in current:
+                    changes.append(Change(resource, "delete", name, current[name][0], {}))
+                changes.append(Change(resource, "create", name, None, desired))
+                continue
+            id_, item = current[name]
+            if "lights" in item:
+                item = {**item, "lights": sorted_ids(item["lights"])}
+            updates: dict = {key: value for key, value in desired.items() if key not in immutable and key != nested}
+            if updates := _diff(updates, item):
+                changes.append(Change(resource, "update", name, id_, updates))
+            if nested and nested in desired:
+                states: dict = details.get(id_, {}).get(nested, {})
+                changes.extend(
+                    Change(resource, "update", name, id_, payload, path=f"{nested}/{key}")
+                    for key, payload in desired[nested].items() if not same(payload, states.get(key))
+                )
+        return changes
+    
+    def _details(self, resource: str, current: Dict[str, Tuple[str, dict]], nested: Optional[str]) -> Dict[str, dict]:
+        """
+        The full state omits scene lightstates, read only the scenes whose lightstates are managed.
+        """
+        if nested is None:
+            return {}
+        ids: List[str] = [current[name][0] for name, spec in self.spec[resource].items()
+                          if name in current and nested in spec]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return dict(zip(ids, executor.map(lambda id_: self.hue.request(path=f"{resource}/{id_}"), ids)))
+    
+    def plan(self) -> List[Change]:
+        """
+        :return: Every change the spec needs, without sending any.
+        IDs of resources that are still to be created are left as {group:NAME} / {scene:NAME}.
+        """
+        if self.current is None:
+            self.fetch()
+        return (self.plan_groups() + self.plan_scenes() + self.plan_schedules()
+                + [change for resource in reversed(RESOURCES) for change in self.plan_deletes(resource)])
+    
+    # Applying
+    def send(self, change: Change) -> Union[list, dict]:
+        resource = getattr(self.hue, change.resource)
+        payload: dict = dict(change.payload)
+        if change.op == "delete":
+            return resource.delete(change.id)
+        if change.op == "create":
+            if change.resource == "groups":
+                return resource.create(payload.pop("lights"), payload.pop("name"),
+                                       group_type=payload.pop("type", "LightGroup"), cls=payload.pop("class", "Other"))
+            if change.resource == "scenes":
+                scene_type: str = payload.pop("type", "GroupScene" if payload.get("group") is not None else "LightScene")
+                return resource.create(payload.pop("name"), payload.pop("recycle", False), scene_type,
+                                       group=payload.pop("group", None), lights=payload.pop("lights", None),
+                                       params=payload)
+            return resource.create(payload.pop("command"), params=payload)
+        if change.path:
+            return self.hue.request(path=f"{change.resource}/{change.id}/{change.path}", method="PUT", payload=payload)
+        if change.resource == "scenes":
+            return resource.modify(change.id, params=payload)
+        return resource.set_attributes(change.id, payload)
+    
+    def _run(self, changes: List[Change]) -> List[Tuple[Change, Union[list, dict]]]:
+        if not changes:
+            return []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(zip(changes, executor.map(self.send, changes)))
+        for change, res in results:
+            if change.op == "create" and change.resource in ("groups", "scenes"):
+                if (id_ := _created_id(res)) is not None:
+                    self.ids[change.resource[:-1]][change.name] = id_
+        return results
+    
+    def apply(self) -> List[Tuple[Change, Union[list, dict]]]:
+        """
+        Send the changes phase by phase, resolving the IDs of created groups and scenes for the next phase.
+        A resource whose immutable attributes changed is deleted before it is created again,
+        a light belongs to one Room only so the bridge rejects the new Room while the old one exists.
+        :return: (change, response) for every request sent
+        """
+        if self.current is None:
+            self.fetch()
+        results: List[Tuple[Change, Union[list, dict]]] = []
+        for plan in (self.plan_groups, self.plan_scenes, self.plan_schedules):
+            changes: List[Change] = plan()
+            results += self._run([change for change in changes if change.op == "delete"])
+            results += self._run([change for change in changes if change.op != "delete" and not change.path])
+            results += self._run([change for change in changes if change.op != "delete" and change.path])
+        for resource in reversed(RESOURCES):
+            results += self._run(self.plan_deletes(resource))
+        return results
+
+
+def reconcile(hue, spec: Union[str, dict], dry_run: bool = False, **kwargs) -> Union[List[Change], List[Tuple[Change, Union[list, dict]]]]:
+    """
+    :param dry_run: Return the planned changes instead of sending them
+    :param kwargs: Passed to Reconciler
+    """
+    reconciler = Reconciler(hue, spec, **kwargs)
+    return reconciler.plan() if dry_run else reconciler.apply()
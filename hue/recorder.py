@@ -0,0 +1,128 @@
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from .frames import getter, pandas
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+logger = logging.getLogger(__name__)
+
+RECORD_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "lights": ("state.on", "state.bri", "state.hue", "state.sat", "state.ct", "state.reachable"),
+    "groups": ("state.all_on", "state.any_on", "action.on", "action.bri"),
+    "sensors": ("state.presence", "state.temperature", "state.lightlevel", "state.buttonevent",
+                "config.battery"),
+}
+
+
+class StateRecorder:
+    """
+    Append-only history of resource snapshots kept in preallocated columnar ring buffers.
+    Each snapshot appends one row per resource; once `capacity` rows are stored the
+    oldest rows are overwritten. A failed poll is counted in `failures` and skipped.
+    """
+    
+    def __init__(self, resource: str = "lights", capacity: int = 100_000,
+                 fields: Optional[Tuple[str, ...]] = None):
+        self.resource: str = resource
+        self.capacity: int = capacity
+        self.fields: Tuple[str, ...] = fields if fields else RECORD_FIELDS[resource]
+        self._getters: Tuple[Callable[[dict], object], ...] = tuple(getter(field) for field in self.fields)
+        self.timestamps: np.ndarray = np.empty(capacity, dtype=np.float64)
+        self.ids: np.ndarray = np.empty(capacity, dtype=object)
+        self.values: np.ndarray = np.empty((capacity, len(self.fields)), dtype=np.float64)
+        self.size: int = 0
+        self.cursor: int = 0
+        self.failures: int = 0
+        self.last_error: Optional[Union[Exception, list]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    @staticmethod
+    def _number(value: object) -> float:
+        if value is None or type(value) not in (bool, int, float):
+            return np.nan
+        return float(value)
+    
+    def record(self, res: Union[dict, list], timestamp: Optional[float] = None) -> None:
+        """
+        :param res: {id: resource} as returned by All.lights()/groups()/sensors()
+        """
+        if type(res) is not dict:
+            return
+        timestamp = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            for key, item in res.items():
+                n: int = self.cursor
+                self.timestamps[n] = timestamp
+                self.ids[n] = key
+                self.values[n] = [self._number(get(item)) for get in self._getters]
+                self.cursor = (n + 1) % self.capacity
+                self.size = min(self.size + 1, self.capacity)
+    
+    def poll(self, hue) -> None:
+        res = getattr(hue.all, self.resource)()
+        if type(res) is not dict:
+            # Error response of the bridge
+            self.failures += 1
+            self.last_error = res
+        self.record(res)
+    
+    def start(self, hue, interval: float = 5.0) -> "StateRecorder":
+        """
+        Record a snapshot every `interval` seconds in a background thread.
+        """
+        def loop() -> None:
+            while not self._stop.is_set():
+                try:
+                    self.poll(hue)
+                except Exception as e:
+                    # e.g. a timeout, the next poll still runs
+                    self.failures += 1
+                    self.last_error = e
+                    logger.warning("State recording failed: %r", e)
+                self._stop.wait(interval)
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name="hue-recorder", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _ordered(self, array: np.ndarray) -> np.ndarray:
+        if self.size < self.capacity:
+            return array[:self.size]
+        return np.concatenate((array[self.cursor:], array[:self.cursor]))
+    
+    def to_dataframe(self) -> "DataFrame":
+        """
+        :return: The recorded rows from the oldest to the newest
+        """
+        with self._lock:
+            df = pandas().DataFrame(self._ordered(self.values), columns=list(self.fields))
+            df.insert(0, "id", self._ordered(self.ids))
+            df.insert(0, "timestamp", self._ordered(self.timestamps))
+        df["timestamp"] = pandas().to_datetime(df["timestamp"], unit="s")
+        return df
+    
+    def to_parquet(self, path: str) -> None:
+        self.to_dataframe().to_parquet(path, index=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self.size = 0
+            self.cursor = 0
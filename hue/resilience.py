@@ -0,0 +1,174 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Optional, Tuple, Union
+
+import requests
+
+from . import util
+from .exceptions import CircuitOpenException
+
+IDEMPOTENT_METHODS: frozenset = frozenset(("GET", "PUT", "DELETE", "HEAD", "OPTIONS"))
+RETRYABLE_STATUS: frozenset = frozenset((429, 500, 502, 503, 504))
+RETRYABLE_BRIDGE_ERRORS: frozenset = frozenset((901,))  # Internal error of the bridge
+RETRYABLE_EXCEPTIONS: tuple = (requests.ConnectionError, requests.Timeout, json.JSONDecodeError)
+# Relative changes and alerts act again on each attempt, a PUT with them is not idempotent
+REPEATING_KEYS: frozenset = frozenset(("bri_inc", "sat_inc", "hue_inc", "ct_inc", "xy_inc", "alert"))
+
+Response = Tuple[int, Union[list, dict]]
+
+
+def retryable(status: int, body: Union[list, dict]) -> bool:
+    if status in RETRYABLE_STATUS:
+        return True
+    if type(body) is list:
+        return any(type(item) is dict and item.get("error", {}).get("type") in RETRYABLE_BRIDGE_ERRORS
+                   for item in body)
+    return False
+
+
+def idempotent(method: str, payload: Optional[dict] = None) -> bool:
+    if method not in IDEMPOTENT_METHODS:
+        return False
+    return method != "PUT" or type(payload) is not dict or REPEATING_KEYS.isdisjoint(payload)
+
+
+class CircuitBreaker:
+    """
+    Fails fast after `failure_threshold` consecutive failures.
+    After `reset_timeout` seconds one trial request is let through (half-open); its
+    success closes the circuit and its failure opens it again.
+    """
+    CLOSED: str = "closed"
+    OPEN: str = "open"
+    HALF_OPEN: str = "half_open"
+    
+    def __init__(self, failure_threshold: int = util.BREAKER_FAILURES,
+                 reset_timeout: float = util.BREAKER_RESET_TIMEOUT,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold: int = failure_threshold
+        self.reset_timeout: float = reset_timeout
+        self.clock = clock
+        self.state: str = self.CLOSED
+        self.failures: int = 0
+        self.opened_at: float = 0.0
+        self.trips: int = 0
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+    
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+    
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+
+class Resilience:
+    """
+    Retries, circuit breaking and hedged reads around each bridge request.
+    
+    :param retries: Extra attempts for idempotent requests (POST, and PUT with *_inc or alert, are never retried)
+    :param backoff: Base of the exponential backoff; each sleep is drawn uniformly up to the cap (full jitter)
+    :param hedge_after: Send a second identical GET when the first has not answered after this many seconds
+    """
+    
+    def __init__(self, retries: int = util.RETRIES, backoff: float = util.RETRY_BACKOFF,
+                 max_backoff: float = util.RETRY_MAX_BACKOFF,
+                 breaker: Optional[CircuitBreaker] = None,
+                 hedge_after: Optional[float] = None, hedge_workers: int = 4):
+        self.retries: int = retries
+        self.backoff: float = backoff
+        self.max_backoff: float = max_backoff
+        self.breaker: CircuitBreaker = breaker if breaker else CircuitBreaker()
+        self.hedge_after: Optional[float] = hedge_after
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if hedge_after is not None:
+            self._executor = ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix="hue-hedge")
+        self.counters: dict = {"retries": 0, "failures": 0, "short_circuits": 0, "hedges": 0, "hedge_wins": 0}
+        self._lock = threading.Lock()
+    
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "trips": self.breaker.trips, "state": self.breaker.state}
+    
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+    
+    def call(self, method: str, send: Callable[[], Response], payload: Optional[dict] = None) -> Union[list, dict]:
+        """
+        :param send: Performs one attempt and returns (HTTP status, JSON body)
+        :param payload: Body of the request, decides whether a PUT may be retried
+        """
+        attempts: int = 1 + (self.retries if idempotent(method, payload) else 0)
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                self._count("short_circuits")
+                raise CircuitOpenException
+            last: bool = attempt == attempts - 1
+            try:
+                status, body = self._hedged(send) if method == "GET" and self._executor else send()
+            except RETRYABLE_EXCEPTIONS:
+                self._failed(unreachable=True)
+                if last:
+                    raise
+            except Exception:
+                # Any other error still ends a half-open trial, the circuit would stay half-open otherwise
+                self._failed(unreachable=True)
+                raise
+            else:
+                if not retryable(status, body):
+                    self.breaker.record_success()
+                    return body
+                
+                # An overloaded bridge (429, error 901) is retried but does not open the circuit
+                self._failed(unreachable=status >= 500)
+                if last:
+                    return body
+            self._count("retries")
+            time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+    
+    def _failed(self, unreachable: bool) -> None:
+        self._count("failures")
+        if unreachable:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+    
+    def _hedged(self, send: Callable[[], Response]) -> Response:
+        first: Future = self._executor.submit(send)
+        done, _ = wait((first,), timeout=self.hedge_after)
+        if done:
+            return first.result()
+        self._count("hedges")
+        second: Future = self._executor.submit(send)
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None or not pending:
+                    if future is second and future.exception() is None:
+                        self._count("hedge_wins")
+                    return future.result()
@@ -0,0 +1,43 @@
+from typing import Union, Optional, Any, List
+
+from .util import _id_check
+
+
+class Rules:
+    def __init__(self, parent):
+        self.base: str = parent.base
+        self.request = parent.request
+    
+    def create(self, name: str, conditions: List[dict], actions: List[dict], status: str = "enabled",
+               params: Optional[dict] = None, **kwargs: Any) -> Union[list, dict]:
+        payload: dict = {
+            "name": name,
+            "conditions": conditions,
+            "actions": actions,
+            "status": status,
+        }
+        if type(params) is dict:
+            payload.update(params)
+        payload.update(kwargs)
+        return self.request(path="rules", method="POST", payload=payload)
+    
+    def get_attributes(self, id_: Union[int, str]) -> Union[list, dict]:
+        _id_check(id_)
+        return self.request(path=f"rules/{id_}")
+    
+    def set_attributes(self, id_: Union[int, str], params: Optional[dict] = None, **kwargs: Any) -> Union[list, dict]:
+        _id_check(id_)
+        payload: dict = {}
+        if type(params) is dict:
+            payload.update(params)
+        payload.update(kwargs)
+        return self.request(path=f"rules/{id_}", method="PUT", payload=payload)
+    
+    def enable(self, id_: Union[int, str]) -> Union[list, dict]:
+        return self.set_attributes(id_, status="enabled")
+    
+    def disable(self, id_: Union[int, str]) -> Union[list, dict]:
+        return self.set_attributes(id_, status="disabled")
+    
+    def delete(self, id_: Union[int, str]) -> Union[list, dict]:
+        return self.request(path=f"rules/{id_}", method="DELETE")
@@ -26,12 +26,24 @@ class Scenes:
         payload.update(kwargs)
         return self.request(path="scenes", method="POST", payload=payload)
 
-    def modify(self):
-        pass
+    def modify(self, scene_id: str, params: Optional[dict] = None, **kwargs: Any) -> Union[list, dict]:
+        payload: dict = {}
+        if type(params) is dict:
+            payload.update(params)
+        payload.update(kwargs)
+        return self.request(path=f"scenes/{scene_id}", method="PUT", payload=payload)
     
-    def delete(self):
-        pass
-        # return self.request(path=f"schedules/{id_}", method="DELETE")
-
-    def get(self):
-        pass
\ No newline at end of file
+    def lightstates(self, scene_id: str, light_id: Union[int, str], payload: dict) -> Union[list, dict]:
+        _id_check(light_id)
+        return self.request(path=f"scenes/{scene_id}/lightstates/{light_id}", method="PUT", payload=payload)
+    
+    def delete(self, scene_id: str) -> Union[list, dict]:
+        return self.request(path=f"scenes/{scene_id}", method="DELETE")
+    
+    def get(self, scene_id: Optional[str] = None) -> Union[list, dict]:
+        """
+        :return: All scenes, or one scene including its lightstates
+        """
+        if scene_id is None:
+            return self.request(path="scenes")
+        return self.request(path=f"scenes/{scene_id}")
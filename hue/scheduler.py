@@ -0,0 +1,248 @@
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterator, List, Optional
+
+from . import util
+
+HIGH: int = 0
+NORMAL: int = 1
+LOW: int = 2
+PRIORITIES: tuple = (HIGH, NORMAL, LOW)
+
+BUCKET_PATTERNS: Dict[str, re.Pattern] = {
+    "lights": re.compile(r"^lights/[^/]+/state/?$"),
+    "groups": re.compile(r"^groups/[^/]+/action/?$"),
+}
+
+
+def default_priority(payload: Optional[dict]) -> int:
+    """
+    :return: HIGH for on/off, alerts and scene recalls, LOW for effects, NORMAL otherwise
+    """
+    if not payload:
+        return NORMAL
+    if "on" in payload or "alert" in payload or "scene" in payload:
+        return HIGH
+    if "effect" in payload:
+        return LOW
+    return NORMAL
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate: float = rate
+        self.capacity: float = capacity if capacity else rate
+        self.tokens: float = self.capacity
+        self.updated: Optional[float] = None
+    
+    def _refill(self, now: float) -> None:
+        if self.updated is None:
+            self.updated = now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self, now: float) -> float:
+        """
+        :return: Seconds until a token is available (0 if one is available now)
+        """
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+    
+    def consume(self, now: float) -> bool:
+        if self.wait_time(now) > 0:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class Command:
+    __slots__ = ("key", "bucket", "payload", "send", "priority", "enqueued", "futures")
+    
+    def __init__(self, key: str, bucket: str, payload: Optional[dict],
+                 send: Callable[[Optional[dict]], object], priority: int):
+        self.key: str = key
+        self.bucket: str = bucket
+        self.payload: Optional[dict] = payload
+        self.send = send
+        self.priority: int = priority
+        self.enqueued: float = time.monotonic()
+        self.futures: List[Future] = [Future()]
+
+
+class CommandScheduler:
+    """
+    Paces light state and group action commands to what the bridge can handle.
+    Commands are queued in priority lanes, a newer command for the same endpoint is merged
+    into the queued one (last write wins per attribute), and each lane is drained through
+    separate token buckets for lights and groups.
+    """
+    
+    def __init__(self, light_rate: float = util.LIGHT_COMMANDS_PER_SEC,
+                 group_rate: float = util.GROUP_COMMANDS_PER_SEC,
+                 workers: int = 2,
+                 priority_fx: Callable[[Optional[dict]], int] = default_priority,
+                 history: int = 1024):
+        self.buckets: Dict[str, TokenBucket] = {
+            "lights": TokenBucket(light_rate),
+            "groups": TokenBucket(group_rate),
+        }
+        self.priority_fx = priority_fx
+        self._lanes: List[Deque[Command]] = [deque() for _ in PRIORITIES]
+        self._queued: Dict[str, Command] = {}
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hue-scheduler")
+        self._thread: Optional[threading.Thread] = None
+        self._closed: bool = False
+        
+        # Statistics
+        self._waits: Deque[float] = deque(maxlen=history)
+        self._counts: Dict[str, int] = {"submitted": 0, "sent": 0, "coalesced": 0}
+        self._max_depth: int = 0
+    
+    @staticmethod
+    def bucket_for(path: str) -> Optional[str]:
+        for name, ptn in BUCKET_PATTERNS.items():
+            if ptn.match(path):
+                return name
+        return None
+    
+    @contextmanager
+    def priority(self, priority: int) -> Iterator[None]:
+        """
+        Force the priority of the commands submitted by the current thread.
+        """
+        prev = getattr(self._local, "priority", None)
+        self._local.priority = priority
+        try:
+            yield
+        finally:
+            self._local.priority = prev
+    
+    def submit(self, key: str, bucket: str, payload: Optional[dict],
+               send: Callable[[Optional[dict]], object], priority: Optional[int] = None) -> Future:
+        """
+        :param key: Coalescing key, a newer command with the same key is merged into a queued one
+        :param bucket: "lights" or "groups"
+        :param send: Called with the payload from a worker thread when a token is available
+        :return: A future resolved with the return value of send
+        """
+        if priority is None:
+            priority = getattr(self._local, "priority", None)
+        if priority is None:
+            priority = self.priority_fx(payload)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("The scheduler is closed.")
+            self._counts["submitted"] += 1
+            if queued := self._queued.get(key):
+                future = self._coalesce(queued, payload, send, priority)
+            else:
+                command = Command(key, bucket, payload, send, priority)
+                self._queued[key] = command
+                self._lanes[priority].append(command)
+                future = command.futures[0]
+            self._max_depth = max(self._max_depth, len(self._queued))
+            self._start()
+            self._cond.notify()
+        return future
+    
+    def _coalesce(self, queued: Command, payload: Optional[dict],
+                  send: Callable[[Optional[dict]], object], priority: int) -> Future:
+        self._counts["coalesced"] += 1
+        # Last write wins per attribute, earlier keys that were not rewritten are kept
+        queued.payload = {**(queued.payload or {}), **(payload or {})} or payload
+        queued.send = send
+        priority = min(priority, self.priority_fx(queued.payload))
+        if priority < queued.priority:
+            self._lanes[queued.priority].remove(queued)
+            self._lanes[priority].append(queued)
+            queued.priority = priority
+        future = Future()
+        queued.futures.append(future)
+        return future
+    
+    def _start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="hue-scheduler", daemon=True)
+            self._thread.start()
+    
+    def _next(self, now: float) -> Optional[float]:
+        """
+        Dispatch the first runnable command in priority order.
+        :return: 0 if a command was dispatched, the seconds to wait for a token, or None if the queue is empty
+        """
+        wait: Optional[float] = None
+        for lane in self._lanes:
+            for command in lane:
+                bucket = self.buckets[command.bucket]
+                if bucket.consume(now):
+                    lane.remove(command)
+                    del self._queued[command.key]
+                    self._dispatch(command, now)
+                    return 0.0
+                delay = bucket.wait_time(now)
+                wait = delay if wait is None else min(wait, delay)
+        return wait
+    
+    def _dispatch(self, command: Command, now: float) -> None:
+        self._counts["sent"] += 1
+        self._waits.append(now - command.enqueued)
+        self._executor.submit(self._send, command)
+    
+    @staticmethod
+    def _send(command: Command) -> None:
+        try:
+            res = command.send(command.payload)
+        except Exception as e:
+            for future in command.futures:
+                future.set_exception(e)
+            return
+        for future in command.futures:
+            future.set_result(res)
+    
+    def _run(self) -> None:
+        with self._cond:
+            while not self._closed:
+                wait = self._next(time.monotonic())
+                if wait != 0.0:
+                    self._cond.wait(timeout=wait)
+    
+    def stats(self) -> dict:
+        """
+        :return: Queue depth per lane and wait times (seconds) of the recently dispatched commands
+        """
+        with self._cond:
+            waits: List[float] = sorted(self._waits)
+            depth: Dict[str, int] = {name: len(lane) for name, lane in zip(("high", "normal", "low"), self._lanes)}
+            stats: dict = {
+                "queue_depth": sum(depth.values()),
+                "lane_depth": depth,
+                "max_queue_depth": self._max_depth,
+                **self._counts,
+            }
+        stats.update({
+            "wait_mean": sum(waits) / len(waits) if waits else 0.0,
+            "wait_p50": waits[int(len(waits) * 0.5)] if waits else 0.0,
+            "wait_p95": waits[int(len(waits) * 0.95)] if waits else 0.0,
+            "wait_max": waits[-1] if waits else 0.0,
+        })
+        return stats
+    
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            for lane in self._lanes:
+                for command in lane:
+                    for future in command.futures:
+                        future.cancel()
+                lane.clear()
+            self._queued.clear()
+            self._cond.notify_all()
+        self._executor.shutdown(wait=True)
@@ -8,13 +8,13 @@ class Schedules:
         self.base: str = parent.base
         self.request = parent.request
     
-    def create(self, command: dict, time_: str, localtime: str,
-                        params: Optional[dict] = None, **kwargs: Any) -> Union[list, dict]:
-        payload: dict = {
-            "command": command,
-            "time": time_,
-            "localtime": localtime,
-        }
+    def create(self, command: dict, time_: Optional[str] = None, localtime: Optional[str] = None,
+               params: Optional[dict] = None, **kwargs: Any) -> Union[list, dict]:
+        payload: dict = {"command": command}
+        if time_ is not None:
+            payload["time"] = time_
+        if localtime is not None:
+            payload["localtime"] = localtime
         if type(params) is dict:
             payload.update(params)
         payload.update(kwargs)
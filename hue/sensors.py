@@ -0,0 +1,37 @@
+from typing import Union
+
+from .util import _id_check
+
+
+class Sensors:
+    def __init__(self, parent):
+        self.base: str = parent.base
+        self.request = parent.request
+    
+    def get_new_sensors(self) -> Union[list, dict]:
+        return self.request(path="sensors/new")
+    
+    def search_new_sensors(self) -> Union[list, dict]:
+        return self.request(path="sensors", method="POST")
+    
+    def create(self, payload: dict) -> Union[list, dict]:
+        return self.request(path="sensors", method="POST", payload=payload)
+    
+    def get_attributes(self, sensor_id: Union[int, str]) -> Union[list, dict]:
+        _id_check(sensor_id)
+        return self.request(path=f"sensors/{sensor_id}")
+    
+    def rename(self, sensor_id: Union[int, str], name: str) -> Union[list, dict]:
+        _id_check(sensor_id)
+        return self.request(path=f"sensors/{sensor_id}", method="PUT", payload={"name": name})
+    
+    def set_config(self, sensor_id: Union[int, str], payload: dict) -> Union[list, dict]:
+        _id_check(sensor_id)
+        return self.request(path=f"sensors/{sensor_id}/config", method="PUT", payload=payload)
+    
+    def set_state(self, sensor_id: Union[int, str], payload: dict) -> Union[list, dict]:
+        _id_check(sensor_id)
+        return self.request(path=f"sensors/{sensor_id}/state", method="PUT", payload=payload)
+    
+    def delete(self, sensor_id: Union[int, str]) -> Union[list, dict]:
+        return self.request(path=f"sensors/{sensor_id}", method="DELETE")
@@ -0,0 +1,318 @@
+import copy
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple, Union
+
+from .scheduler import BUCKET_PATTERNS, TokenBucket
+
+RESOURCES: Tuple[str, ...] = ("lights", "groups", "scenes", "schedules", "sensors", "rules", "resourcelinks")
+STATE_PATHS: Dict[str, str] = {"lights": "state", "groups": "action"}
+
+
+def _error(type_: int, address: str, description: str) -> List[dict]:
+    return [{"error": {"type": type_, "address": address, "description": description}}]
+
+
+def make_light(n: int) -> dict:
+    return {
+        "state": {
+            "on": False, "bri": 254, "hue": 8418, "sat": 140, "effect": "none",
+            "xy": [0.4573, 0.41], "ct": 366, "alert": "none", "colormode": "xy",
+            "mode": "homeautomation", "reachable": True,
+        },
+        "type": "Extended color light",
+        "name": f"Hue color lamp {n}",
+        "modelid": "LCT015",
+        "manufacturername": "Signify Netherlands B.V.",
+        "productname": "Hue color lamp",
+        "capabilities": {"control": {"colorgamuttype": "C", "ct": {"min": 153, "max": 500}}},
+        "uniqueid": f"00:17:88:01:00:00:{n // 256:02x}:{n % 256:02x}-0b",
+        "swversion": "1.50.2_r30933",
+    }
+
+
+def make_sensor(n: int) -> dict:
+    return {
+        "state": {"presence": False, "lastupdated": "2020-01-01T00:00:00"},
+        "config": {"on": True, "battery": 100, "reachable": True},
+        "name": f"Hue motion sensor {n}",
+        "type": "ZLLPresence",
+        "modelid": "SML001",
+        "manufacturername": "Signify Netherlands B.V.",
+        "uniqueid": f"00:17:88:01:02:00:{n // 256:02x}:{n % 256:02x}-02-0406",
+    }
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class BridgeState:
+    """
+    The datastore of the simulated bridge (v1 API).
+    """
+    
+    def __init__(self, lights: int = 10, groups: int = 2, sensors: int = 4):
+        self.lock = threading.RLock()
+        self.data: Dict[str, dict] = {resource: {} for resource in RESOURCES}
+        self.data["config"] = {"name": "Hue Simulator", "bridgeid": "001788FFFE000000", "apiversion": "1.50.0",
+                               "modelid": "BSB002", "whitelist": {}}
+        self.data["lights"] = {str(n): make_light(n) for n in range(1, lights + 1)}
+        self.data["sensors"] = {str(n): make_sensor(n) for n in range(1, sensors + 1)}
+        ids: List[str] = list(self.data["lights"])
+        for n in range(1, groups + 1):
+            self.data["groups"][str(n)] = {
+                "name": f"Room {n}", "type": "Room", "class": "Other",
+                "lights": ids[n - 1::groups],
+                "action": dict(make_light(0)["state"]),
+                "state": {"all_on": False, "any_on": False},
+            }
+        self.owner: Optional[str] = None
+        self._next_id: Dict[str, int] = {resource: len(self.data[resource]) + 1 for resource in RESOURCES}
+    
+    def group_lights(self, group_id: str) -> List[str]:
+        if group_id == "0":
+            return list(self.data["lights"])
+        return self.data["groups"].get(group_id, {}).get("lights", [])
+    
+    def get(self, parts: List[str]) -> Union[list, dict]:
+        with self.lock:
+            if not parts:
+                return copy.deepcopy(self.data)
+            node = self.data
+            for part in parts:
+                if type(node) is not dict or part not in node:
+                    return _error(3, "/" + "/".join(parts), f"resource, /{'/'.join(parts)}, not available")
+                node = node[part]
+            return copy.deepcopy(node)
+    
+    def create(self, resource: str, payload: dict) -> List[dict]:
+        with self.lock:
+            new_id: str = str(self._next_id[resource])
+            self._next_id[resource] += 1
+            item: dict = copy.deepcopy(payload)
+            if resource == "rules":
+                item.setdefault("status", "enabled")
+                item.update(owner=self.owner, timestriggered=0)
+            if resource == "groups":
+                item.setdefault("action", {"on": False})
+                item.setdefault("state", {"all_on": False, "any_on": False})
+            self.data[resource][new_id] = item
+            return [{"success": {"id": new_id}}]
+    
+    def delete(self, parts: List[str]) -> List[dict]:
+        with self.lock:
+            if self.data.get(parts[0], {}).pop(parts[1], None) is None:
+                return _error(3, "/" + "/".join(parts), "resource not available")
+            return [{"success": f"/{parts[0]}/{parts[1]} deleted"}]
+    
+    def update(self, parts: List[str], payload: dict) -> List[dict]:
+        with self.lock:
+            if parts == ["groups", "0", "action"]:
+                # Group 0 (all lights) is not listed but accepts actions
+                self._group_action("0", payload)
+                return [{"success": {f"/groups/0/action/{key}": value}} for key, value in payload.items()]
+            item = self.data.get(parts[0], {}).get(parts[1]) if len(parts) > 1 else None
+            if type(item) is not dict:
+                return _error(3, "/" + "/".join(parts), "resource not available")
+            node: dict = item
+            for part in parts[2:]:
+                node = node.setdefault(part, {})
+            address: str = "/" + "/".join(parts)
+            res: List[dict] = []
+            for key, value in payload.items():
+                node[key] = value
+                res.append({"success": {f"{address}/{key}": value}})
+            if parts[0] == "groups" and parts[2:] == ["action"]:
+                self._group_action(parts[1], payload)
+            return res
+    
+    def _group_action(self, group_id: str, payload: dict) -> None:
+        if scene_id := payload.get("scene"):
+            for light_id, state in self.data["scenes"].get(scene_id, {}).get("lightstates", {}).items():
+                self.data["lights"].get(light_id, {}).get("state", {}).update(state)
+            return
+        for light_id in self.group_lights(group_id):
+            self.data["lights"].get(light_id, {}).get("state", {}).update(payload)
+
+
+class FakeBridge:
+    """
+    Localhost HTTP server implementing the v1 endpoints used by the SDK.
+    
+    with FakeBridge(lights=50, latency=0.03) as bridge:
+        hue = Hue(ip=bridge.ip, user_name=bridge.user_name)
+    
+    :param latency: Seconds added to every response, +/- jitter
+    :param light_rate: Light state commands per second before 429 responses (None disables)
+    :param group_rate: Group action commands per second before 429 responses (None disables)
+    :param error_rate: Probability of answering with a bridge error instead of handling the request
+    :param link_button: False answers pairing with error 101 until press_link_button() is called
+    """
+    
+    def __init__(self, lights: int = 10, groups: int = 2, sensors: int = 4,
+                 latency: float = 0.0, jitter: float = 0.0,
+                 light_rate: Optional[float] = None, group_rate: Optional[float] = None,
+                 error_rate: float = 0.0, error_type: int = 901,
+                 user_name: str = "simulator", host: str = "127.0.0.1", port: int = 0,
+                 seed: Optional[int] = None, link_button: bool = True):
+        self.state = BridgeState(lights=lights, groups=groups, sensors=sensors)
+        self.state.data["config"]["whitelist"][user_name] = {"name": "hue-sdk-py"}
+        self.user_name: str = user_name
+        self.state.owner = user_name
+        self.link_button: bool = link_button
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.error_rate: float = error_rate
+        self.error_type: int = error_type
+        self.buckets: Dict[str, TokenBucket] = {}
+        if light_rate:
+            self.buckets["lights"] = TokenBucket(light_rate)
+        if group_rate:
+            self.buckets["groups"] = TokenBucket(group_rate)
+        self.random = random.Random(seed)
+        self.requests: int = 0
+        self.rejected: int = 0
+        self._lock = threading.Lock()
+        self.server = _Server((host, port), self._handler())
+        # Distinct bridge IDs let discovery tell several simulators apart
+        self.state.data["config"]["bridgeid"] = f"001788FFFE{self.server.server_address[1]:06X}"
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def ip(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"{host}:{port}"
+    
+    def start(self) -> "FakeBridge":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="hue-simulator", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def __enter__(self) -> "FakeBridge":
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+    
+    def _delay(self) -> None:
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+    
+    def _limited(self, method: str, path: str) -> bool:
+        if method != "PUT":
+            return False
+        for name, bucket in self.buckets.items():
+            if BUCKET_PATTERNS[name].match(path):
+                with self._lock:
+                    return not bucket.consume(time.monotonic())
+        return False
+    
+    def handle(self, method: str, url: str, payload: Optional[dict]) -> Tuple[int, Union[list, dict]]:
+        """
+        :return: (HTTP status, JSON body)
+        """
+        self._delay()
+        with self._lock:
+            self.requests += 1
+            inject: bool = self.random.random() < self.error_rate
+        parts: List[str] = [part for part in url.split("?")[0].strip("/").split("/") if part]
+        if not parts or parts[0] != "api":
+            return 404, _error(4, url, "method not available")
+        if len(parts) == 1:
+            if method == "POST":
+                return 200, self._pair(payload or {})
+            return 200, _error(4, "/", f"method, {method}, not available for resource, /")
+        if parts[1:] == ["config"] and method == "GET":
+            # Unauthenticated config used by discovery
+            return 200, self._public_config()
+        if parts[1] != self.user_name:
+            return 200, _error(1, "/", "unauthorized user")
+        if inject:
+            return 200, _error(self.error_type, url, "injected error")
+        parts = parts[2:]
+        if self._limited(method, "/".join(parts)):
+            with self._lock:
+                self.rejected += 1
+            return 429, _error(901, url, "rate limit exceeded")
+        return 200, self._route(method, parts, payload)
+    
+    def press_link_button(self) -> None:
+        self.link_button = True
+    
+    def _pair(self, payload: dict) -> List[dict]:
+        if not self.link_button:
+            return _error(101, "", "link button not pressed")
+        success: dict = {"username": self.user_name}
+        if payload.get("generateclientkey"):
+            success["clientkey"] = self.state.data["config"]["bridgeid"] * 2
+        return [{"success": success}]
+    
+    def _public_config(self) -> dict:
+        config: dict = self.state.data["config"]
+        return {key: config[key] for key in ("name", "bridgeid", "apiversion", "modelid")}
+    
+    def _route(self, method: str, parts: List[str], payload: Optional[dict]) -> Union[list, dict]:
+        if parts and parts[0] not in RESOURCES and parts[0] not in ("config", "capabilities", "timezones"):
+            return _error(4, "/" + "/".join(parts), "method not available")
+        if not parts and method != "GET":
+            # Only the full state can be read at /api/<user>
+            return _error(4, "/", f"method, {method}, not available for resource, /")
+        if method == "GET":
+            if parts[1:] == ["new"]:
+                return {"lastscan": "none"}
+            if parts == ["capabilities"] or parts == ["timezones"]:
+                return {}
+            return self.state.get(parts)
+        if method == "POST":
+            return self._create(parts, payload)
+        if method == "PUT":
+            return self.state.update(parts, payload or {})
+        if method == "DELETE" and len(parts) == 2:
+            return self.state.delete(parts)
+        return _error(4, "/" + "/".join(parts), "method not available")
+    
+    def _create(self, parts: List[str], payload: Optional[dict]) -> List[dict]:
+        if len(parts) != 1 or parts[0] not in RESOURCES:
+            return _error(4, "/" + "/".join(parts), f"method, POST, not available for resource, /{'/'.join(parts)}")
+        if parts[0] in ("lights", "sensors") and not payload:
+            return [{"success": {f"/{parts[0]}": "Searching for new devices"}}]
+        return self.state.create(parts[0], payload or {})
+    
+    def _handler(self) -> type:
+        bridge = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+            
+            def log_message(self, *args) -> None:
+                pass
+            
+            def _serve(self) -> None:
+                length: int = int(self.headers.get("Content-Length") or 0)
+                raw: bytes = self.rfile.read(length) if length else b""
+                try:
+                    payload = json.loads(raw) if raw else None
+                except ValueError:
+                    status, body = 400, _error(2, self.path, "body contains invalid json")
+                else:
+                    status, body = bridge.handle(self.command, self.path, payload)
+                data: bytes = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            do_GET = do_PUT = do_POST = do_DELETE = _serve
+        
+        return Handler
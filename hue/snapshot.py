@@ -0,0 +1,113 @@
+from typing import Dict, Iterable, List, Optional, Union
+
+from . import util
+from .metrics import error_types
+from .planner import _created_id
+
+SNAPSHOT_NAME: str = "hue-sdk-py snapshot"
+COLOR_KEYS: Dict[str, tuple] = {"xy": ("xy",), "ct": ("ct",), "hs": ("hue", "sat")}
+
+
+def capture(state: dict) -> dict:
+    """
+    :return: The part of a light state that a scene stores and recalls (on, bri and the active color mode)
+    """
+    if not state.get("on"):
+        return {"on": False}
+    stored: dict = {"on": True}
+    if "bri" in state:
+        stored["bri"] = state["bri"]
+    for key in COLOR_KEYS.get(state.get("colormode"), ()):
+        if key in state:
+            stored[key] = state[key]
+    return stored
+
+
+class Snapshot:
+    """
+    The states of some lights, stored as a bridge scene so that one recall restores all of them.
+    Falls back to keeping the states locally when the scene cannot be written (e.g. the scene table is full).
+    
+    with hue.snapshot([1, 2, 3]):
+        hue.groups.alert(0, "lselect")
+    
+    :param lights: Light IDs, all lights when omitted
+    :param use_scene: False keeps the snapshot local only
+    """
+    
+    def __init__(self, hue, lights: Optional[Iterable[Union[int, str]]] = None, use_scene: bool = True,
+                 transitiontime: Optional[int] = None):
+        self.hue = hue
+        self.lights: Optional[List[str]] = list(map(str, lights)) if lights is not None else None
+        self.use_scene: bool = use_scene
+        self.transitiontime: Optional[int] = transitiontime
+        self.states: Dict[str, dict] = {}
+        self.scene_id: Optional[str] = None
+    
+    def __enter__(self) -> "Snapshot":
+        # hue.snapshot() has already taken it
+        if self.states:
+            return self
+        return self.take()
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.restore()
+    
+    def take(self) -> "Snapshot":
+        """
+        Read every light in one request and write their states to a scene.
+        """
+        lights: dict = self.hue.all.lights()
+        ids: List[str] = self.lights if self.lights is not None else list(lights)
+        self.states = {light_id: capture(lights[light_id]["state"]) for light_id in ids if light_id in lights}
+        if self.transitiontime is not None:
+            for state in self.states.values():
+                state["transitiontime"] = self.transitiontime
+        self.delete()
+        if self.use_scene and self.states:
+            res = self.hue.scenes.create(SNAPSHOT_NAME, True, "LightScene", lights=list(self.states),
+                                         params={"lightstates": self.states})
+            self.scene_id = _created_id(res)
+        return self
+    
+    def restore(self, keep: bool = False) -> List[Union[list, dict]]:
+        """
+        Recall the scene in one request, or replay only the lights that changed without a scene.
+        Falls back to the replay when the bridge rejects the recall.
+        :param keep: Keep the scene on the bridge to restore again later
+        """
+        if self.scene_id is not None:
+            res = self.hue.groups.scene(0, self.scene_id)
+            if not keep:
+                self.delete()
+            if not error_types(res):
+                return [res]
+            return [res] + self.restore_local()
+        return self.restore_local()
+    
+    def restore_local(self) -> List[Union[list, dict]]:
+        """
+        Read the lights once and send only the keys that differ from the snapshot,
+        collapsing identical changes into group actions.
+        No scene or temporary group is written, this is also the fallback when they cannot be.
+        """
+        lights: dict = self.hue.all.lights()
+        changes: Dict[str, dict] = {}
+        for light_id, stored in self.states.items():
+            current: dict = capture(lights.get(light_id, {}).get("state", {}))
+            diff: dict = {key: value for key, value in stored.items()
+                          if key != "transitiontime" and not util.same(value, current.get(key))}
+            if diff:
+                if stored["on"]:
+                    diff["on"] = True
+                if self.transitiontime is not None:
+                    diff["transitiontime"] = self.transitiontime
+                changes[light_id] = diff
+        if not changes:
+            return []
+        return self.hue.apply_states(changes, use_scenes=False, use_temp_groups=False)
+    
+    def delete(self) -> None:
+        if self.scene_id is not None:
+            self.hue.scenes.delete(self.scene_id)
+            self.scene_id = None
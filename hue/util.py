@@ -1,21 +1,53 @@
+import json
 import os
 import re
-from typing import Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-import yaml
-from colormath.color_conversions import convert_color
-from colormath.color_objects import XYZColor, sRGBColor
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 
 from .exceptions import (
+    NoConnectionSettingsException,
     ColorcodeFormatException,
     IpAddressFmtException,
     IdFormatException,
-    ColorcodeRangeException,
-    NoIuminanceException,
 )
 
+COLOR_CODE_PATTERN = re.compile(r"^#[A-Fa-f0-9]{6}$")
 AUTH_FAILURE_RETRIES: int = 6
 AUTH_FAILURE_SLEEP: int = 5
+DEFAULT_POOL_SIZE: int = 10
+DEFAULT_TIMEOUT: tuple = (3.05, 10.0)  # (connect, read) seconds
+LIGHT_COMMANDS_PER_SEC: float = 10.0
+GROUP_COMMANDS_PER_SEC: float = 1.0
+EVENTS_BACKOFF: float = 1.0
+EVENTS_MAX_BACKOFF: float = 60.0
+EVENTS_CHUNK_SIZE: int = 65536
+EVENTS_READ_TIMEOUT: float = 90.0  # The bridge sends a keep-alive comment about every minute
+POLL_BUDGET: float = 2.0  # Requests per second shared by all sensors
+POLL_MIN_INTERVAL: float = 0.5
+POLL_MAX_INTERVAL: float = 60.0
+POLL_MIN_SLEEP: float = 0.05
+STREAM_PORT: int = 2100
+STREAM_RATE: float = 50.0
+ANIMATION_MAX_FPS: float = 10.0
+RETRIES: int = 2
+RETRY_BACKOFF: float = 0.1
+RETRY_MAX_BACKOFF: float = 2.0
+BREAKER_FAILURES: int = 5
+BREAKER_RESET_TIMEOUT: float = 10.0
+RULES_MAX: int = 250
+RULE_MAX_CONDITIONS: int = 8
+RULE_MAX_ACTIONS: int = 8
+RULE_NAME_MAX_LENGTH: int = 32
+DISCOVERY_BUDGET: float = 5.0  # Seconds for SSDP, mDNS and the subnet probe together
+DISCOVERY_WORKERS: int = 64
+PROBE_TIMEOUT: float = 1.0
+SSDP_ADDRESS: tuple = ("239.255.255.250", 1900)
+MDNS_ADDRESS: tuple = ("224.0.0.251", 5353)
+XY_TOLERANCE: float = 5e-4
 
 
 class YamlConfig:
@@ -31,6 +63,7 @@ class YamlConfig:
         """
         :return: Return yaml data as dictionary format
         """
+        import yaml
         with open(self.file_path, "r", encoding="utf-8") as yf:
             return yaml.load(yf, Loader=yaml.FullLoader)
     
@@ -39,10 +72,42 @@ class YamlConfig:
         Export yaml
         :param data: A dictionary of data that will be output in Yaml format
         """
+        import yaml
         with open(self.file_path, "w", encoding="utf-8") as yf:
             yaml.dump(data, yf, default_flow_style=False)
 
 
+def load_settings(yc: Optional[YamlConfig] = None) -> dict:
+    yc = yc if yc else YamlConfig()
+    if not yc.exists():
+        raise NoConnectionSettingsException
+    return yc.load() or {}
+
+
+def load_auth(yc: Optional[YamlConfig] = None) -> dict:
+    """
+    :return: The Auth block, or the first bridge of the Bridges block
+    """
+    settings: dict = load_settings(yc)
+    if auth := settings.get("Auth"):
+        return auth
+    if bridges := settings.get("Bridges"):
+        return next(iter(bridges.values()))
+    raise NoConnectionSettingsException
+
+
+def load_bridges(yc: Optional[YamlConfig] = None) -> dict:
+    """
+    :return: The Bridges block {name: {"ip": ..., "user_name": ...}}, or the Auth block as {"default": ...}
+    """
+    settings: dict = load_settings(yc)
+    if bridges := settings.get("Bridges"):
+        return bridges
+    if auth := settings.get("Auth"):
+        return {"default": auth}
+    raise NoConnectionSettingsException
+
+
 def range_check(name, start, end, exception):
     def set_fx(fx):
         def inner(*args, **kwargs) -> Union[list, dict]:
@@ -65,8 +130,7 @@ def ip_reg(ip_address_str: str) -> None:
 
 
 def cc_reg(color_code: str) -> None:
-    ptn = re.compile(r"^#[A-Fa-f0-9]{6}$")
-    if not ptn.match(color_code):
+    if not COLOR_CODE_PATTERN.match(color_code):
         raise ColorcodeFormatException
 
 
@@ -79,20 +143,16 @@ def cc_range(num: Union[int, float]) -> bool:
     return not 255 >= num >= 0
 
 
-def rgb2xy(r: int, g: int, b: int) -> tuple:
-    if cc_range(r) or cc_range(g) or cc_range(b):
-        raise ColorcodeRangeException
-    elif not all((r, g, b)):
-        raise NoIuminanceException
-    red: float = r / 255.0
-    green: float = g / 255.0
-    blue: float = b / 255.0
-    rgb = sRGBColor(red, green, blue)
-    xyz = convert_color(rgb, XYZColor, target_illuminant="d50")
-    xyz_sum: float = (xyz.xyz_x + xyz.xyz_y + xyz.xyz_z)
-    x: float = xyz.xyz_x / xyz_sum
-    y: float = xyz.xyz_y / xyz_sum
-    return x, y
+def rgb2xy(r: int, g: int, b: int, gamut: Optional[str] = None) -> tuple:
+    # hue.color (NumPy) is imported on the first color conversion
+    from .color import rgb2xy_batch
+    x, y = rgb2xy_batch(((r, g, b),), gamut=gamut)[0]
+    return float(x), float(y)
+
+
+def hex2xy(color_code: str, gamut: Optional[str] = None) -> tuple:
+    from .color import hex2xy
+    return hex2xy(color_code, gamut=gamut)
 
 
 def hex2dec(color_code: str) -> dict:
@@ -100,3 +160,34 @@ def hex2dec(color_code: str) -> dict:
     c: str = color_code[1:]
     rgb: dict = {k: int(c[int(n * 2):int((n + 1) * 2)], 16) for n, k in enumerate("rgb")}
     return rgb
+
+
+def same(desired: Any, current: Any) -> bool:
+    """
+    True when `current` already satisfies `desired`. Dictionaries only compare the keys of `desired`
+    so that attributes maintained by the bridge never show up as changes.
+    """
+    if isinstance(desired, dict):
+        return isinstance(current, dict) and all(
+            key in current and same(value, current[key]) for key, value in desired.items()
+        )
+    if isinstance(desired, (list, tuple)):
+        return (isinstance(current, (list, tuple)) and len(desired) == len(current)
+                and all(map(same, desired, current)))
+    if isinstance(desired, float) or isinstance(current, float):
+        return isinstance(current, (int, float)) and abs(desired - current) <= XY_TOLERANCE
+    return desired == current
+
+
+def sorted_ids(ids) -> List[str]:
+    return sorted(map(str, ids), key=lambda key: (len(key), key))
+
+
+def by_name(items: dict) -> Dict[str, Tuple[str, dict]]:
+    """
+    :return: {name: (id, item)}, the lowest ID wins when names are duplicated
+    """
+    named: Dict[str, Tuple[str, dict]] = {}
+    for id_ in sorted_ids(items):
+        named.setdefault(items[id_].get("name"), (id_, items[id_]))
+    return named
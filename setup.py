@@ -7,13 +7,22 @@ setup(
     license="MIT",
     author="Kohei Miyashita",
     author_email="k@rmc-8.com",
-    install_requires=["requests", "ColorPy", "PyYaml"],
+    install_requires=["requests", "numpy", "PyYaml"],
     url="https://github.com/rmc8/hue-sdk-py",
     keywords=["Hue", "Philips", "SDK"],
+    extras_require={
+        "async": ["aiohttp"],
+        "fast": ["orjson"],
+        "pandas": ["pandas"],
+        "dtls": ["python-mbedtls"],
+    },
     packages=find_packages(),
     entry_points={
         "console_scripts": [
             "hueconn = hue.conn:main",
+            "huebench = hue.bench:main",
+            "hued = hue.daemon:main",
+            "hue = hue.cli:main",
         ],
     },
 )